@@ -1,12 +1,23 @@
-from supabase import create_client, Client
+from supabase import acreate_client, AsyncClient, AsyncClientOptions
+from typing import Optional
 from dotenv import load_dotenv
+import asyncio
+import httpx
 import os
+import random
+
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
 
 load_dotenv()
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
+REDIS_URL = os.getenv("REDIS_URL")
 print(SUPABASE_URL)
 
 if not SUPABASE_URL:
@@ -16,12 +27,98 @@ if not SUPABASE_KEY:
 if not SUPABASE_SERVICE_KEY:
     raise ValueError("SUPABASE_SERVICE_KEY environment variable is required")
 
+# Connection pool shared by both clients. PostgREST is plain HTTP, so the pool
+# is sized here instead of through SQLAlchemy-style pool_size/max_overflow;
+# keepalive_expiry plays the role of pool_recycle.
+# Defaults stay under Supabase's connection cap; override per deployment via env.
+HTTP_LIMITS = httpx.Limits(
+    max_connections=int(os.getenv("SUPABASE_MAX_CONNECTIONS", "10")),
+    max_keepalive_connections=int(os.getenv("SUPABASE_MAX_KEEPALIVE", "5")),
+    keepalive_expiry=1800
+)
+HTTP_TIMEOUT = httpx.Timeout(float(os.getenv("SUPABASE_TIMEOUT", "30")))
+
+# Failures where the request never reached Supabase, so it is always safe to send again
+DB_RETRY_ERRORS = (httpx.PoolTimeout, httpx.ConnectError, httpx.ConnectTimeout)
+DB_RETRY_ATTEMPTS = 3
+DB_RETRY_MIN_DELAY = 0.1
+DB_RETRY_MAX_DELAY = 2.0
+
+class RetryTransport(httpx.AsyncBaseTransport):
+    """
+    Wraps the pooled transport so every Supabase call retries connection-level
+    failures (pool exhaustion, refused/timed-out connects) with jittered exponential backoff
+    """
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        for attempt in range(DB_RETRY_ATTEMPTS):
+            try:
+                return await self._transport.handle_async_request(request)
+            except DB_RETRY_ERRORS as e:
+                if attempt == DB_RETRY_ATTEMPTS - 1:
+                    raise
+                delay = random.uniform(DB_RETRY_MIN_DELAY, min(DB_RETRY_MAX_DELAY, DB_RETRY_MIN_DELAY * 2 ** (attempt + 1)))
+                print(f"Supabase request failed ({type(e).__name__}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+_http_client: Optional[httpx.AsyncClient] = None
 
 # Regular client for normal operations (with RLS)
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+supabase: Optional[AsyncClient] = None
 
 # Service role client for administrative operations (bypasses RLS)
-supabase_admin: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+supabase_admin: Optional[AsyncClient] = None
+
+# Optional Redis for state shared across workers (caches, interview sessions)
+_redis = None
+
+async def init_clients():
+    """Create the Supabase clients on top of a single pooled HTTP/2 connection"""
+    global _http_client, supabase, supabase_admin
+    if _http_client is not None:
+        return
+
+    transport = RetryTransport(httpx.AsyncHTTPTransport(limits=HTTP_LIMITS, http2=True))
+    _http_client = httpx.AsyncClient(transport=transport, timeout=HTTP_TIMEOUT)
+    supabase = await acreate_client(
+        SUPABASE_URL, SUPABASE_KEY, options=AsyncClientOptions(httpx_client=_http_client)
+    )
+    supabase_admin = await acreate_client(
+        SUPABASE_URL, SUPABASE_SERVICE_KEY, options=AsyncClientOptions(httpx_client=_http_client)
+    )
+
+async def close_clients():
+    """Close the shared HTTP pool and Redis connection"""
+    global _http_client, supabase, supabase_admin, _redis
+    if _http_client is not None:
+        await _http_client.aclose()
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
+    _http_client = None
+    supabase = None
+    supabase_admin = None
+
+def get_supabase() -> AsyncClient:
+    """Regular client; usable directly or as a FastAPI dependency"""
+    if supabase is None:
+        raise RuntimeError("Supabase client not initialized; call init_clients() on startup")
+    return supabase
+
+def get_supabase_admin() -> AsyncClient:
+    """Service role client; usable directly or as a FastAPI dependency"""
+    if supabase_admin is None:
+        raise RuntimeError("Supabase client not initialized; call init_clients() on startup")
+    return supabase_admin
 
-# async def get_client() -> Client:
-#     create_client(SUPABASE_URL, SUPABASE_KEY)
\ No newline at end of file
+def get_redis():
+    """Lazily create the Redis client; None when REDIS_URL is unset or redis isn't installed"""
+    global _redis
+    if _redis is None and REDIS_AVAILABLE and REDIS_URL:
+        _redis = aioredis.from_url(REDIS_URL)
+    return _redis
@@ -1,7 +1,36 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from . import database
+from .utils import ORJSONResponse
+from .services import applicant_service, interview_service
 from .routers import applicant_router, recruiter_router, auth_router, api_router, websocket_router, video_interview_router
 
-app = FastAPI(title="Smart Recruiting Assistant", description="AI-powered interview system")
+# Prefer uvloop when available (uvicorn also picks it with --loop uvloop)
+try:
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:
+    pass
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    loop_class = type(asyncio.get_running_loop())
+    print(f"Event loop: {loop_class.__module__}.{loop_class.__qualname__}")
+    await database.init_clients()
+    applicant_service.init_parse_pool()
+    interview_service.init_http_client()
+    yield
+    await interview_service.close_http_client()
+    applicant_service.shutdown_parse_pool()
+    await database.close_clients()
+
+app = FastAPI(
+    title="Smart Recruiting Assistant",
+    description="AI-powered interview system",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
+)
 app.include_router(applicant_router.router)
 app.include_router(recruiter_router.router)
 app.include_router(auth_router.router)
@@ -10,4 +39,9 @@ app.include_router(websocket_router.router)
 app.include_router(video_interview_router.router)
 @app.get('/')
 async def home():
-    return "Smart Recruiting Assistant"
\ No newline at end of file
+    return "Smart Recruiting Assistant"
+
+if __name__ == "__main__":
+    import uvicorn
+    # "auto" selects uvloop and httptools when installed (uvloop is not available on Windows)
+    uvicorn.run(app, host="0.0.0.0", port=8000, loop="auto", http="auto")
@@ -1,4 +1,6 @@
+import orjson
 from fastapi import APIRouter,Form
+from fastapi.responses import StreamingResponse
 from ..schemas import InterviewAnswerRequest
 router = APIRouter(prefix="/api",tags=["api"])
 
@@ -6,13 +8,26 @@ from ..services import interview_service
 
 @router.get('/questions')
 async def get_questions(prompt):
-    return interview_service.get_questions(prompt)
+    return await interview_service.get_questions(prompt)
 
 @router.post('/next_question')
 async def next_question(request: InterviewAnswerRequest):
     followup = await interview_service.process_answer_and_get_next(request.session_id, request.answer)
     return followup
 
+@router.post('/next_question/stream')
+async def next_question_stream(request: InterviewAnswerRequest):
+    """Stream the next question as server-sent events: text deltas, then a done (or error) event"""
+    async def events():
+        try:
+            async for text in interview_service.stream_answer_and_get_next(request.session_id, request.answer):
+                yield b"data: " + orjson.dumps({"text": text}) + b"\n\n"
+            yield b"event: done\ndata: {}\n\n"
+        except Exception as e:
+            yield b"event: error\ndata: " + orjson.dumps({"detail": str(e)}) + b"\n\n"
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
 @router.post('/finish_interview')
 async def finish_interview(session_id: str):
     report = await interview_service.generate_report(session_id)
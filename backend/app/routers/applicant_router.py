@@ -1,11 +1,24 @@
-from fastapi import APIRouter,UploadFile,File,HTTPException,Form
+from fastapi import APIRouter,UploadFile,File,HTTPException,Form,Request
 from typing import Optional, Dict, Any
 from ..services import applicant_service,interview_service
 from ..schemas import InterviewResponse, InterviewStartRequest
+from ..utils import etag_response
 from datetime import datetime
+import os
 
 router = APIRouter(prefix='/applicant',tags=["applicant"])
 
+UPLOAD_CHUNK_SIZE = 64 * 1024
+MAX_RESUME_SIZE = 10 * 1024 * 1024
+
+# More flexible content type checking
+VALID_CONTENT_TYPES = frozenset({
+    "application/pdf",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "application/octet-stream"  # Sometimes PDFs are detected as this
+})
+VALID_EXTENSIONS = frozenset({"pdf", "docx"})
+
 @router.get('/')
 async def appdash():
     """Applicant dashboard"""
@@ -15,40 +28,36 @@ async def appdash():
 async def upload_resume(applicant_id: str = Form(...), file: UploadFile = File(...)):
     """Upload and parse resume file, then save to database"""
     # Check file extension as backup if content_type detection fails
-    file_extension = file.filename.lower().split('.')[-1] if file.filename else ""
-    
-    # More flexible content type checking
-    valid_content_types = [
-        "application/pdf", 
-        "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-        "application/octet-stream"  # Sometimes PDFs are detected as this
-    ]
-    
-    valid_extensions = ["pdf", "docx"]
+    file_extension = os.path.splitext(file.filename or "")[1][1:].lower()
     
     # Check both content type and file extension
-    if (file.content_type not in valid_content_types and file_extension not in valid_extensions):
+    if (file.content_type not in VALID_CONTENT_TYPES and file_extension not in VALID_EXTENSIONS):
         raise HTTPException(
             status_code=400, 
             detail=f"Invalid file type. File type detected: '{file.content_type}', Extension: '{file_extension}'. Only PDF and DOCX files are supported."
         )
     
-    # Additional validation for PDF files
-    if file_extension == "pdf" or "pdf" in (file.content_type or "").lower():
-        # Reset file pointer and read first few bytes to verify it's actually a PDF
-        await file.seek(0)
-        header = await file.read(4)
-        await file.seek(0)  # Reset for processing
-        
-        if header != b'%PDF':
+    is_pdf = file_extension == "pdf" or "pdf" in (file.content_type or "").lower()
+    
+    # Read the upload once in chunks, checking the PDF header on the first chunk
+    buf = bytearray()
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        if not buf and is_pdf and chunk[:4] != b'%PDF':
             raise HTTPException(status_code=400, detail="File appears to be corrupted or not a valid PDF.")
+        buf.extend(chunk)
+        if len(buf) > MAX_RESUME_SIZE:
+            raise HTTPException(status_code=413, detail="Resume file is too large.")
+    data = bytes(buf)
     
     try:
         # Parse the resume file
-        parsed_data = await applicant_service.parse_resume(file)
+        parsed_data = await applicant_service.parse_resume(data, file.content_type, file.filename)
         
         # Save to database
-        result = await applicant_service.save_resume_to_database(applicant_id, file, parsed_data)
+        result = await applicant_service.save_resume_to_database(applicant_id, file, parsed_data, len(data))
         
         return result
         
@@ -56,20 +65,20 @@ async def upload_resume(applicant_id: str = Form(...), file: UploadFile = File(.
         raise HTTPException(status_code=500, detail=f"Error processing resume: {str(e)}")
 
 @router.get('/resumes/{applicant_id}')
-async def get_applicant_resumes(applicant_id: str):
+async def get_applicant_resumes(applicant_id: str, request: Request):
     """Get all resumes uploaded by an applicant"""
     try:
         resumes = await applicant_service.get_applicant_resumes(applicant_id)
-        return {"resumes": resumes, "count": len(resumes)}
+        return etag_response(request, {"resumes": resumes, "count": len(resumes)})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving resumes: {str(e)}")
 
 @router.get('/resume/{upload_id}')
-async def get_resume_by_id(upload_id: str):
+async def get_resume_by_id(upload_id: str, request: Request):
     """Get a specific resume by its upload ID"""
     try:
         resume = await applicant_service.get_resume_by_id(upload_id)
-        return resume
+        return etag_response(request, resume)
     except Exception as e:
         raise HTTPException(status_code=404, detail=f"Resume not found: {str(e)}")
 
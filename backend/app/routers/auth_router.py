@@ -1,6 +1,5 @@
 from fastapi import APIRouter,HTTPException,status,Body
 from ..schemas import RegisterRequest,LoginRequest
-from ..database import supabase
 from ..services import auth_service
 
 router = APIRouter(prefix="/auth",tags=["auth"])
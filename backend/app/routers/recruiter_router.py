@@ -1,7 +1,8 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
 from typing import Optional, Dict, Any, List
 from ..services import recruiter_service
 from ..schemas import InterviewReport, InterviewStatistics, APIResponse
+from ..utils import etag_response
 
 router = APIRouter(prefix='/recruiter', tags=["recruiter"])
 
@@ -20,33 +21,41 @@ async def recruiter_dashboard():
         raise HTTPException(status_code=500, detail=f"Error loading dashboard: {str(e)}")
 
 @router.get('/applicant_reports')
-async def get_applicant_reports():
-    """Get all interview reports"""
+async def get_applicant_reports(
+    request: Request,
+    limit: int = Query(50, ge=1, le=200, description="Maximum number of reports per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page")
+):
+    """Get interview reports, newest first, one page at a time"""
     try:
-        reports = await recruiter_service.get_all_reports()
-        return {"reports": reports, "total": len(reports)}
+        page = await recruiter_service.get_all_reports(limit, cursor)
+        return etag_response(request, {
+            "reports": page["items"],
+            "count": len(page["items"]),  # Size of this page; next_cursor signals more
+            "next_cursor": page["next_cursor"]
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching reports: {str(e)}")
 
 @router.get('/report/{report_id}')
-async def get_report_details(report_id: str):
+async def get_report_details(report_id: str, request: Request):
     """Get detailed view of a specific interview report"""
     try:
         report = await recruiter_service.get_report_by_id(report_id)
         if not report:
             raise HTTPException(status_code=404, detail="Report not found")
-        return report
+        return etag_response(request, report)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching report: {str(e)}")
 
 @router.get('/applicant/{applicant_id}/reports')
-async def get_applicant_interview_history(applicant_id: str):
+async def get_applicant_interview_history(applicant_id: str, request: Request):
     """Get all interview reports for a specific applicant"""
     try:
         reports = await recruiter_service.get_reports_by_applicant(applicant_id)
-        return {"applicant_id": applicant_id, "reports": reports, "total": len(reports)}
+        return etag_response(request, {"applicant_id": applicant_id, "reports": reports, "total": len(reports)})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching applicant reports: {str(e)}")
 
@@ -83,14 +92,12 @@ async def search_interview_reports(
         if date_to:
             filters["date_to"] = date_to
         
-        # Get all matching reports
-        all_reports = await recruiter_service.search_reports(q or "", filters)
-        
-        # Apply pagination with safe defaults
-        total_results = len(all_reports)
+        # Fetch just the requested page; the total comes from the database count
         safe_limit = limit or 50
         safe_offset = offset or 0
-        paginated_reports = all_reports[safe_offset:safe_offset + safe_limit]
+        paginated_reports, total_results = await recruiter_service.search_reports(
+            q or "", filters, safe_limit, safe_offset
+        )
         
         return {
             "query": q,
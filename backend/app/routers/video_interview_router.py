@@ -1,39 +1,49 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException
-from typing import Dict, List
-import json
+from typing import Dict, Set
+import orjson
+import msgspec
 import asyncio
-import base64
-from datetime import datetime
 from ..services import video_interview_service
-from ..schemas import InterviewStartRequest, APIResponse
+from ..utils import fast_iso
+from ..schemas import InterviewStartRequest, APIResponse, VideoClientMessage, AudioChunkMessage, VideoFrameMessage, TextChatMessage
 
 router = APIRouter(prefix='/video-interview', tags=["video-interview"])
 
-# Store active WebSocket connections for video interviews
-video_connections: Dict[str, List[WebSocket]] = {}
-
 class VideoConnectionManager:
     def __init__(self):
-        self.active_connections: Dict[str, List[WebSocket]] = {}
+        self.active_connections: Dict[str, Set[WebSocket]] = {}
         self.session_connections: Dict[str, WebSocket] = {}  # Map session_id to websocket
+        self.listeners: Dict[str, asyncio.Task] = {}  # One Gemini listener per session, fanned out
 
     async def connect(self, websocket: WebSocket, session_id: str):
         await websocket.accept()
         if session_id not in self.active_connections:
-            self.active_connections[session_id] = []
-        self.active_connections[session_id].append(websocket)
+            self.active_connections[session_id] = set()
+        self.active_connections[session_id].add(websocket)
         self.session_connections[session_id] = websocket
 
     def disconnect(self, websocket: WebSocket, session_id: str):
         if session_id in self.active_connections:
-            if websocket in self.active_connections[session_id]:
-                self.active_connections[session_id].remove(websocket)
+            self.active_connections[session_id].discard(websocket)
             if not self.active_connections[session_id]:
                 del self.active_connections[session_id]
+                # Last client left; nobody is left to forward responses to
+                self.stop_listener(session_id)
         
-        if session_id in self.session_connections:
+        if self.session_connections.get(session_id) is websocket:
             del self.session_connections[session_id]
 
+    def start_listener(self, session_id: str, session):
+        """Start the session's Gemini listener unless one is already running"""
+        task = self.listeners.get(session_id)
+        if task is None or task.done():
+            self.listeners[session_id] = asyncio.create_task(listen_to_gemini_responses(session, session_id))
+
+    def stop_listener(self, session_id: str):
+        task = self.listeners.pop(session_id, None)
+        if task is not None:
+            task.cancel()
+
     async def send_personal_message(self, message: str, websocket: WebSocket):
         try:
             await websocket.send_text(message)
@@ -41,16 +51,48 @@ class VideoConnectionManager:
             pass  # Connection might be closed
 
     async def send_to_session(self, message: str, session_id: str):
-        if session_id in self.active_connections:
-            for connection in self.active_connections[session_id]:
-                try:
-                    await connection.send_text(message)
-                except:
-                    # Connection might be closed, remove it
-                    self.active_connections[session_id].remove(connection)
+        connections = self.active_connections.get(session_id)
+        if not connections:
+            return
+        dead = []
+        # Snapshot: connect/disconnect may mutate the set while we await a send
+        for connection in tuple(connections):
+            try:
+                await connection.send_text(message)
+            except:
+                # Connection might be closed, remove it after the loop
+                dead.append(connection)
+        if dead:
+            connections.difference_update(dead)
 
 video_manager = VideoConnectionManager()
 
+# Typed decoder for JSON client messages (validates and base64-decodes in one pass)
+VIDEO_MESSAGE_DECODER = msgspec.json.Decoder(VideoClientMessage)
+
+# Tag byte at the start of binary websocket frames sent by the client
+BINARY_MESSAGE_TYPES = {
+    0: "audio_chunk",
+    1: "video_frame",
+    2: "text_message"
+}
+
+def dumps(message: Dict) -> str:
+    """Serialize an outgoing message with orjson; frames stay text so clients can JSON.parse them"""
+    return orjson.dumps(message).decode()
+
+# Constant messages serialized once at import; only the timestamp (and
+# session id) is filled in per send
+SESSION_NOT_FOUND_MESSAGE = dumps({"type": "error", "message": "Video interview session not found"})
+AUDIO_FAILED_MESSAGE = dumps({"type": "error", "message": "Failed to send audio to AI"})
+VIDEO_FAILED_MESSAGE = dumps({"type": "error", "message": "Failed to send video to AI"})
+TEXT_FAILED_MESSAGE = dumps({"type": "error", "message": "Failed to send message to AI"})
+AI_DELTA_TEMPLATE = '{"type":"ai_response_delta","content":%s}'
+PONG_TEMPLATE = '{"type":"pong","timestamp":"%s"}'
+WELCOME_TEMPLATE = '{"type":"connected","session_id":%s,"message":"Connected to video interview session","timestamp":"%s"}'
+DISCONNECT_TEMPLATE = '{"type":"user_disconnected","message":"User disconnected from video interview","timestamp":"%s"}'
+DEFAULT_GREETING = "Hello! Welcome to your video interview. I'm your AI interviewer, and I'm excited to learn more about you today. Let's begin!"
+
 @router.post('/start')
 async def start_video_interview(request: InterviewStartRequest):
     """Start a new video interview session"""
@@ -96,13 +138,12 @@ async def get_video_interview_greeting(session_id: str):
             )
         else:
             # No greeting available yet, return a default one
-            default_greeting = "Hello! Welcome to your video interview. I'm your AI interviewer, and I'm excited to learn more about you today. Let's begin!"
             return APIResponse(
                 success=True,
                 message="Default greeting provided",
                 data={
-                    "greeting": default_greeting,
-                    "timestamp": datetime.now().isoformat(),
+                    "greeting": DEFAULT_GREETING,
+                    "timestamp": fast_iso(),
                     "type": "text"
                 }
             )
@@ -153,92 +194,96 @@ async def video_interview_websocket(websocket: WebSocket, session_id: str):
         session = await video_interview_service.get_video_session(session_id)
         
         if not session:
-            await video_manager.send_personal_message(
-                json.dumps({
-                    "type": "error",
-                    "message": "Video interview session not found"
-                }), 
-                websocket
-            )
+            await video_manager.send_personal_message(SESSION_NOT_FOUND_MESSAGE, websocket)
             return
         
         # Send welcome message
-        welcome_message = {
-            "type": "connected",
-            "session_id": session_id,
-            "message": "Connected to video interview session",
-            "timestamp": datetime.now().isoformat()
-        }
-        await video_manager.send_personal_message(json.dumps(welcome_message), websocket)
+        welcome_message = WELCOME_TEMPLATE % (dumps(session_id), fast_iso())
+        await video_manager.send_personal_message(welcome_message, websocket)
         
-        # Start listening for Gemini responses in background
-        gemini_task = asyncio.create_task(listen_to_gemini_responses(session, websocket))
+        # Start listening for Gemini responses in background (shared by all clients of the session)
+        video_manager.start_listener(session_id, session)
         
         while True:
-            # Receive data from client
-            data = await websocket.receive_text()
+            # Receive data from client: binary media frames or JSON text
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            now = fast_iso()
             
             try:
-                message_data = json.loads(data)
-                message_type = message_data.get("type")
+                payload = b""
+                text_content = ""
+                binary = message.get("bytes")
+                if binary:
+                    # Binary framing: first byte is the message tag, the rest is raw payload
+                    message_type = BINARY_MESSAGE_TYPES.get(binary[0])
+                    payload = binary[1:]
+                    if message_type == "text_message":
+                        text_content = payload.decode("utf-8")
+                else:
+                    try:
+                        frame = VIDEO_MESSAGE_DECODER.decode(message.get("text") or "")
+                    except msgspec.ValidationError as e:
+                        # Unknown "type" or malformed fields
+                        error_message = {
+                            "type": "error",
+                            "message": f"Invalid message: {e}",
+                            "timestamp": now
+                        }
+                        await video_manager.send_personal_message(dumps(error_message), websocket)
+                        continue
+                    message_type = frame.__struct_config__.tag
+                    if isinstance(frame, (AudioChunkMessage, VideoFrameMessage)):
+                        # Legacy JSON media frames: base64 already decoded by msgspec
+                        payload = frame.data
+                    elif isinstance(frame, TextChatMessage):
+                        text_content = frame.content
                 
                 if message_type == "audio_chunk":
                     # Handle audio data
-                    audio_data = base64.b64decode(message_data.get("data", ""))
-                    success = await session.send_audio_chunk(audio_data)
+                    success = await session.send_audio_chunk(payload)
                     
                     if not success:
-                        await video_manager.send_personal_message(
-                            json.dumps({
-                                "type": "error",
-                                "message": "Failed to send audio to AI"
-                            }), 
-                            websocket
-                        )
+                        await video_manager.send_personal_message(AUDIO_FAILED_MESSAGE, websocket)
                 
                 elif message_type == "video_frame":
-                    # Handle video frame data
-                    video_data = base64.b64decode(message_data.get("data", ""))
-                    success = await session.send_video_frame(video_data)
+                    # Queue video frame data; a per-session consumer forwards batches
+                    success = session.enqueue_video_frame(payload)
                     
                     if not success:
-                        await video_manager.send_personal_message(
-                            json.dumps({
-                                "type": "error",
-                                "message": "Failed to send video to AI"
-                            }), 
-                            websocket
-                        )
+                        await video_manager.send_personal_message(VIDEO_FAILED_MESSAGE, websocket)
                 
                 elif message_type == "text_message":
-                    # Handle text message
-                    text_content = message_data.get("content", "")
-                    success = await session.send_text_message(text_content)
+                    # Echo the user message back to confirm receipt
+                    user_message = {
+                        "type": "user_message",
+                        "content": text_content,
+                        "timestamp": now
+                    }
+                    await video_manager.send_to_session(dumps(user_message), session_id)
                     
-                    if success:
-                        # Echo the user message back to confirm receipt
-                        user_message = {
-                            "type": "user_message",
-                            "content": text_content,
-                            "timestamp": datetime.now().isoformat()
-                        }
-                        await video_manager.send_to_session(json.dumps(user_message), session_id)
+                    # Stream the interviewer's reply to every client as it is generated
+                    chunks = []
+                    try:
+                        async for delta in session.stream_text_message(text_content):
+                            chunks.append(delta)
+                            await video_manager.send_to_session(AI_DELTA_TEMPLATE % dumps(delta), session_id)
+                    except Exception as e:
+                        print(f"Error streaming AI response: {e}")
+                        await video_manager.send_personal_message(TEXT_FAILED_MESSAGE, websocket)
                     else:
-                        await video_manager.send_personal_message(
-                            json.dumps({
-                                "type": "error",
-                                "message": "Failed to send message to AI"
-                            }), 
-                            websocket
-                        )
+                        ai_message = {
+                            "type": "ai_response",
+                            "content_type": "text",
+                            "content": "".join(chunks).strip(),
+                            "timestamp": fast_iso()
+                        }
+                        await video_manager.send_to_session(dumps(ai_message), session_id)
                 
                 elif message_type == "ping":
                     # Handle ping for connection health
-                    pong_message = {
-                        "type": "pong",
-                        "timestamp": datetime.now().isoformat()
-                    }
-                    await video_manager.send_personal_message(json.dumps(pong_message), websocket)
+                    await video_manager.send_personal_message(PONG_TEMPLATE % now, websocket)
                 
                 elif message_type == "end_interview":
                     # Handle interview completion
@@ -252,65 +297,56 @@ async def video_interview_websocket(websocket: WebSocket, session_id: str):
                             "type": "interview_completed",
                             "message": "Video interview completed successfully!",
                             "report": report,
-                            "timestamp": datetime.now().isoformat()
+                            "timestamp": fast_iso()  # report generation takes a while
                         }
-                        await video_manager.send_to_session(json.dumps(completion_message), session_id)
+                        await video_manager.send_to_session(dumps(completion_message), session_id)
                         
                         # Cancel the Gemini listening task
-                        gemini_task.cancel()
+                        video_manager.stop_listener(session_id)
                         break
                         
                     except Exception as e:
                         error_message = {
                             "type": "error",
                             "message": f"Error ending interview: {str(e)}",
-                            "timestamp": datetime.now().isoformat()
+                            "timestamp": now
                         }
-                        await video_manager.send_personal_message(json.dumps(error_message), websocket)
+                        await video_manager.send_personal_message(dumps(error_message), websocket)
                 
                 else:
                     # Unknown message type
                     error_message = {
                         "type": "error",
                         "message": f"Unknown message type: {message_type}",
-                        "timestamp": datetime.now().isoformat()
+                        "timestamp": now
                     }
-                    await video_manager.send_personal_message(json.dumps(error_message), websocket)
+                    await video_manager.send_personal_message(dumps(error_message), websocket)
                     
-            except json.JSONDecodeError:
-                # Handle invalid JSON
+            except (msgspec.DecodeError, UnicodeDecodeError):
+                # Handle invalid JSON or undecodable text frames
                 error_message = {
                     "type": "error",
-                    "message": "Invalid message format. Please send valid JSON.",
-                    "timestamp": datetime.now().isoformat()
+                    "message": "Invalid message format. Please send valid JSON or a tagged binary frame.",
+                    "timestamp": now
                 }
-                await video_manager.send_personal_message(json.dumps(error_message), websocket)
+                await video_manager.send_personal_message(dumps(error_message), websocket)
                 
     except WebSocketDisconnect:
         video_manager.disconnect(websocket, session_id)
         
-        # Cancel any running tasks
-        if 'gemini_task' in locals():
-            gemini_task.cancel()
-        
         # Notify about disconnect
-        disconnect_message = {
-            "type": "user_disconnected",
-            "message": "User disconnected from video interview",
-            "timestamp": datetime.now().isoformat()
-        }
-        await video_manager.send_to_session(json.dumps(disconnect_message), session_id)
+        await video_manager.send_to_session(DISCONNECT_TEMPLATE % fast_iso(), session_id)
         
     except Exception as e:
         print(f"Video interview WebSocket error: {e}")
-        
-        # Cancel any running tasks
-        if 'gemini_task' in locals():
-            gemini_task.cancel()
+    
+    finally:
+        # Idempotent; also covers end_interview, errors and unknown sessions
+        video_manager.disconnect(websocket, session_id)
 
-async def listen_to_gemini_responses(session, websocket: WebSocket):
+async def listen_to_gemini_responses(session, session_id: str):
     """
-    Listen for responses from Gemini Live API and forward to client
+    Listen for responses from Gemini Live API and forward to every client of the session
     """
     try:
         async for response in session.listen_for_responses():
@@ -326,10 +362,7 @@ async def listen_to_gemini_responses(session, websocket: WebSocket):
             if response["type"] == "audio":
                 gemini_message["mime_type"] = response.get("mime_type", "audio/pcm")
             
-            await video_manager.send_personal_message(
-                json.dumps(gemini_message), 
-                websocket
-            )
+            await video_manager.send_to_session(dumps(gemini_message), session_id)
             
     except asyncio.CancelledError:
         print("Gemini response listener cancelled")
@@ -340,6 +373,6 @@ async def listen_to_gemini_responses(session, websocket: WebSocket):
         error_message = {
             "type": "ai_error",
             "message": f"AI connection error: {str(e)}",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": fast_iso()
         }
-        await video_manager.send_personal_message(json.dumps(error_message), websocket)
\ No newline at end of file
+        await video_manager.send_to_session(dumps(error_message), session_id)
@@ -1,218 +1,368 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from typing import Dict, List
-import json
+from functools import cached_property
+from typing import Deque, Dict, Optional, Set, Tuple
+from collections import deque
+import orjson
+import msgspec
 import asyncio
-from datetime import datetime
+import os
+import time
 from ..services import interview_service
-from ..schemas import WebSocketMessage
+from ..schemas import ChatClientMessage, UserChatMessage, PingMessage, EndInterviewMessage, GetActiveInterviewsMessage
+from ..utils import fast_iso
 
 router = APIRouter()
 
-# Store active WebSocket connections
-active_connections: Dict[str, List[WebSocket]] = {}
+# Clients that offer this subprotocol get binary MessagePack frames; everyone else gets JSON text
+MSGPACK_SUBPROTOCOL = "msgpack"
+msgpack_encoder = msgspec.msgpack.Encoder()
+
+# Connection limits; a client over a cap is refused with 1008 (policy violation)
+WS_MAX_CONNECTIONS = int(os.getenv("WS_MAX_CONNECTIONS", "1000"))
+# Per-IP cap, off (0) by default: behind a load balancer every client has the proxy's address
+# unless uvicorn runs with --proxy-headers and --forwarded-allow-ips
+WS_MAX_CONNECTIONS_PER_IP = int(os.getenv("WS_MAX_CONNECTIONS_PER_IP", "0"))
+WS_IDLE_TIMEOUT = int(os.getenv("WS_IDLE_TIMEOUT", "300"))  # seconds without a client message
+WS_MAX_QUEUE = int(os.getenv("WS_MAX_QUEUE", "256"))  # queued outgoing messages before a client counts as stalled
+
+# (JSON, MessagePack) decoders for each endpoint's client messages; "type" picks the struct
+CHAT_DECODERS = (msgspec.json.Decoder(ChatClientMessage), msgspec.msgpack.Decoder(ChatClientMessage))
+RECRUITER_DECODERS = (msgspec.json.Decoder(GetActiveInterviewsMessage), msgspec.msgpack.Decoder(GetActiveInterviewsMessage))
+
+class OutgoingMessage:
+    """A server message serialized lazily, at most once per wire format"""
+    def __init__(self, message: Dict):
+        self.message = message
+
+    @cached_property
+    def text(self) -> str:
+        return orjson.dumps(self.message).decode()
+
+    @cached_property
+    def packed(self) -> bytes:
+        return msgpack_encoder.encode(self.message)
+
+class BufferedSender:
+    """
+    Per-connection outbound queue. Senders only enqueue; one drain task writes
+    everything queued since it last ran back-to-back, so a burst (user echo +
+    AI response) goes out in one pass and fan-out never waits on a slow client.
+    """
+    def __init__(self, websocket: WebSocket, session_id: str, msgpack: bool, client_ip: str):
+        self.websocket = websocket
+        self.session_id = session_id
+        self.msgpack = msgpack
+        self.client_ip = client_ip
+        self.last_seen = time.monotonic()
+        self.queue: Deque[OutgoingMessage] = deque()
+        self.ready = asyncio.Event()
+        self.dropped = False
+        self.task = asyncio.create_task(self._drain())
+
+    def send(self, message: OutgoingMessage):
+        if self.dropped:
+            return
+        if len(self.queue) >= WS_MAX_QUEUE:
+            # Client has stopped reading; drop it rather than buffer without bound.
+            # Unregistering is deferred so a fan-out loop never sees the session set change.
+            self.dropped = True
+            self.close()
+            asyncio.create_task(self._drop())
+            return
+        self.queue.append(message)
+        self.ready.set()
+
+    async def _drain(self):
+        try:
+            while True:
+                await self.ready.wait()
+                self.ready.clear()
+                while self.queue:
+                    message = self.queue.popleft()
+                    if self.msgpack:
+                        await self.websocket.send_bytes(message.packed)
+                    else:
+                        await self.websocket.send_text(message.text)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Connection might be closed, remove it
+            manager.disconnect(self.websocket, self.session_id)
+
+    def close(self):
+        self.queue.clear()
+        self.task.cancel()
+
+    async def _drop(self):
+        manager.disconnect(self.websocket, self.session_id)
+        await close_quietly(self.websocket, 1008)
 
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: Dict[str, List[WebSocket]] = {}
+        self.active_connections: Dict[str, Set[WebSocket]] = {}
+        self.recruiter_sessions: Set[str] = set()  # Index of "recruiter_*" session keys
+        self.senders: Dict[WebSocket, BufferedSender] = {}
+        self.per_ip: Dict[str, int] = {}
+        self.reaper: Optional[asyncio.Task] = None
 
-    async def connect(self, websocket: WebSocket, session_id: str):
-        await websocket.accept()
-        if session_id not in self.active_connections:
-            self.active_connections[session_id] = []
-        self.active_connections[session_id].append(websocket)
+    async def connect(self, websocket: WebSocket, session_id: str) -> bool:
+        """Accept the connection, or refuse it and return False if a connection cap is hit"""
+        client_ip = websocket.client.host if websocket.client else "unknown"
+        if len(self.senders) >= WS_MAX_CONNECTIONS or (
+            WS_MAX_CONNECTIONS_PER_IP and self.per_ip.get(client_ip, 0) >= WS_MAX_CONNECTIONS_PER_IP
+        ):
+            await websocket.close(code=1008)
+            return False
+        
+        msgpack = MSGPACK_SUBPROTOCOL in websocket.scope.get("subprotocols", ())
+        await websocket.accept(subprotocol=MSGPACK_SUBPROTOCOL if msgpack else None)
+        self.senders[websocket] = BufferedSender(websocket, session_id, msgpack, client_ip)
+        self.per_ip[client_ip] = self.per_ip.get(client_ip, 0) + 1
+        self.active_connections.setdefault(session_id, set()).add(websocket)
+        if session_id.startswith("recruiter_"):
+            self.recruiter_sessions.add(session_id)
+        
+        if self.reaper is None or self.reaper.done():
+            self.reaper = asyncio.create_task(self._reap_idle())
+        return True
 
     def disconnect(self, websocket: WebSocket, session_id: str):
+        sender = self.senders.pop(websocket, None)
+        if sender is not None:
+            sender.close()
+            remaining = self.per_ip.get(sender.client_ip, 1) - 1
+            if remaining > 0:
+                self.per_ip[sender.client_ip] = remaining
+            else:
+                self.per_ip.pop(sender.client_ip, None)
         if session_id in self.active_connections:
-            if websocket in self.active_connections[session_id]:
-                self.active_connections[session_id].remove(websocket)
+            self.active_connections[session_id].discard(websocket)
             if not self.active_connections[session_id]:
                 del self.active_connections[session_id]
+                self.recruiter_sessions.discard(session_id)
 
-    async def send_personal_message(self, message: str, websocket: WebSocket):
-        await websocket.send_text(message)
+    async def send_personal_message(self, message: OutgoingMessage, websocket: WebSocket):
+        sender = self.senders.get(websocket)
+        if sender is not None:
+            sender.send(message)
 
-    async def send_to_session(self, message: str, session_id: str):
-        if session_id in self.active_connections:
-            for connection in self.active_connections[session_id]:
-                try:
-                    await connection.send_text(message)
-                except:
-                    # Connection might be closed, remove it
-                    self.active_connections[session_id].remove(connection)
+    async def send_to_session(self, message: OutgoingMessage, session_id: str):
+        """
+        Queue a message for every connection in a session. Each wire format is
+        encoded once and shared; JSON goes out as text so browser clients can
+        JSON.parse(event.data) directly.
+        """
+        for connection in list(self.active_connections.get(session_id, ())):
+            sender = self.senders.get(connection)
+            if sender is not None:
+                sender.send(message)
+
+    async def receive(self, websocket: WebSocket, decoders: Tuple[msgspec.json.Decoder, msgspec.msgpack.Decoder]):
+        """
+        Read and validate one client message in whichever format the connection sent.
+        Raises msgspec.ValidationError for unknown types and msgspec.DecodeError for bad frames.
+        """
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", 1000))
+        sender = self.senders.get(websocket)
+        if sender is not None:
+            sender.last_seen = time.monotonic()
+        if message.get("bytes") is not None:
+            return decoders[1].decode(message["bytes"])
+        return decoders[0].decode(message["text"])
+
+    async def _reap_idle(self):
+        """Close connections that have sent nothing for WS_IDLE_TIMEOUT; exits once none are left"""
+        while self.senders:
+            await asyncio.sleep(min(WS_IDLE_TIMEOUT, 60))
+            cutoff = time.monotonic() - WS_IDLE_TIMEOUT
+            for sender in [sender for sender in self.senders.values() if sender.last_seen < cutoff]:
+                self.disconnect(sender.websocket, sender.session_id)
+                await close_quietly(sender.websocket, 1001)
+
+async def close_quietly(websocket: WebSocket, code: int):
+    """Close a websocket that may already be closed"""
+    try:
+        await websocket.close(code=code)
+    except Exception:
+        pass
 
 manager = ConnectionManager()
 
+def make_payload(type_: str, session_id: Optional[str] = None, content: Optional[str] = None,
+                 user_id: Optional[str] = None) -> OutgoingMessage:
+    """
+    Build an outgoing message as a plain dict. Fields are server-generated, so this
+    skips WebSocketMessage validation; unset fields are left out.
+    """
+    message = {"type": type_, "timestamp": fast_iso()}
+    if session_id is not None:
+        message["session_id"] = session_id
+    if content is not None:
+        message["content"] = content
+    if user_id is not None:
+        message["user_id"] = user_id
+    return OutgoingMessage(message)
+
 @router.websocket("/ws/interview/{session_id}")
 async def websocket_interview_endpoint(websocket: WebSocket, session_id: str):
     """
     WebSocket endpoint for real-time interview conversation
     """
-    await manager.connect(websocket, session_id)
+    if not await manager.connect(websocket, session_id):
+        return
     
     try:
         # Send welcome message
-        welcome_message = WebSocketMessage(
-            type="system",
+        welcome_message = make_payload(
+            "system",
             session_id=session_id,
-            content="Connected to interview session. You can start chatting!",
-            timestamp=datetime.now().isoformat()
+            content="Connected to interview session. You can start chatting!"
         )
-        await manager.send_personal_message(welcome_message.json(), websocket)
+        await manager.send_personal_message(welcome_message, websocket)
         
         while True:
-            # Receive message from client
-            data = await websocket.receive_text()
-            
+            # Receive and validate the next client message
             try:
-                # Parse the incoming message
-                message_data = json.loads(data)
+                message = await manager.receive(websocket, CHAT_DECODERS)
+            except msgspec.ValidationError as e:
+                # Unknown "type" or malformed fields
+                error_message = make_payload("error", session_id=session_id, content=f"Invalid message: {e}")
+                await manager.send_personal_message(error_message, websocket)
+                continue
+            except msgspec.DecodeError:
+                # Handle invalid JSON
+                error_message = make_payload(
+                    "error",
+                    session_id=session_id,
+                    content="Invalid message format. Please send valid JSON."
+                )
+                await manager.send_personal_message(error_message, websocket)
+                continue
+            
+            if isinstance(message, UserChatMessage):
+                user_message = message.content
+                
+                # Send user message to all connections in this session
+                user_ws_message = make_payload(
+                    "user_message",
+                    session_id=session_id,
+                    content=user_message,
+                    user_id=message.user_id
+                )
+                await manager.send_to_session(user_ws_message, session_id)
                 
-                if message_data.get("type") == "user_message":
-                    user_message = message_data.get("content", "")
+                # Process the message through the interview service
+                try:
+                    response = await interview_service.process_answer_and_get_next(
+                        session_id, user_message
+                    )
                     
-                    # Send user message to all connections in this session
-                    user_ws_message = WebSocketMessage(
-                        type="user_message",
+                    # Send AI response back to all connections
+                    ai_ws_message = make_payload(
+                        "ai_response",
                         session_id=session_id,
-                        content=user_message,
-                        timestamp=datetime.now().isoformat(),
-                        user_id=message_data.get("user_id", "applicant")
+                        content=response["message"],
+                        user_id="interviewer"
                     )
-                    await manager.send_to_session(user_ws_message.json(), session_id)
+                    await manager.send_to_session(ai_ws_message, session_id)
                     
-                    # Process the message through the interview service
-                    try:
-                        response = await interview_service.process_answer_and_get_next(
-                            session_id, user_message
-                        )
-                        
-                        # Send AI response back to all connections
-                        ai_ws_message = WebSocketMessage(
-                            type="ai_response",
-                            session_id=session_id,
-                            content=response["message"],
-                            timestamp=datetime.now().isoformat(),
-                            user_id="interviewer"
-                        )
-                        await manager.send_to_session(ai_ws_message.json(), session_id)
-                        
-                    except Exception as e:
-                        # Send error message
-                        error_message = WebSocketMessage(
-                            type="error",
-                            session_id=session_id,
-                            content=f"Interview processing error: {str(e)}",
-                            timestamp=datetime.now().isoformat()
-                        )
-                        await manager.send_personal_message(error_message.json(), websocket)
-                
-                elif message_data.get("type") == "ping":
-                    # Handle ping/pong for connection health
-                    pong_message = WebSocketMessage(
-                        type="pong",
+                except Exception as e:
+                    # Send error message
+                    error_message = make_payload(
+                        "error",
                         session_id=session_id,
-                        content="pong",
-                        timestamp=datetime.now().isoformat()
+                        content=f"Interview processing error: {str(e)}"
                     )
-                    await manager.send_personal_message(pong_message.json(), websocket)
-                
-                elif message_data.get("type") == "end_interview":
-                    # Handle interview completion
-                    try:
-                        report = await interview_service.generate_report(session_id)
-                        
-                        completion_message = WebSocketMessage(
-                            type="interview_completed",
-                            session_id=session_id,
-                            content="Interview completed successfully! Report has been generated.",
-                            timestamp=datetime.now().isoformat()
-                        )
-                        await manager.send_to_session(completion_message.json(), session_id)
-                        
-                        # Send report data
-                        report_message = WebSocketMessage(
-                            type="interview_report",
-                            session_id=session_id,
-                            content=json.dumps(report),
-                            timestamp=datetime.now().isoformat()
-                        )
-                        await manager.send_to_session(report_message.json(), session_id)
-                        
-                    except Exception as e:
-                        error_message = WebSocketMessage(
-                            type="error",
-                            session_id=session_id,
-                            content=f"Error generating report: {str(e)}",
-                            timestamp=datetime.now().isoformat()
-                        )
-                        await manager.send_personal_message(error_message.json(), websocket)
-                
-            except json.JSONDecodeError:
-                # Handle invalid JSON
-                error_message = WebSocketMessage(
-                    type="error",
-                    session_id=session_id,
-                    content="Invalid message format. Please send valid JSON.",
-                    timestamp=datetime.now().isoformat()
-                )
-                await manager.send_personal_message(error_message.json(), websocket)
+                    await manager.send_personal_message(error_message, websocket)
+            
+            elif isinstance(message, PingMessage):
+                # Handle ping/pong for connection health
+                pong_message = make_payload("pong", session_id=session_id, content="pong")
+                await manager.send_personal_message(pong_message, websocket)
+            
+            elif isinstance(message, EndInterviewMessage):
+                # Handle interview completion
+                try:
+                    report = await interview_service.generate_report(session_id)
+                    
+                    completion_message = make_payload(
+                        "interview_completed",
+                        session_id=session_id,
+                        content="Interview completed successfully! Report has been generated."
+                    )
+                    await manager.send_to_session(completion_message, session_id)
+                    
+                    # Send report data
+                    report_message = make_payload(
+                        "interview_report",
+                        session_id=session_id,
+                        content=orjson.dumps(report).decode()
+                    )
+                    await manager.send_to_session(report_message, session_id)
+                    
+                except Exception as e:
+                    error_message = make_payload(
+                        "error",
+                        session_id=session_id,
+                        content=f"Error generating report: {str(e)}"
+                    )
+                    await manager.send_personal_message(error_message, websocket)
                 
     except WebSocketDisconnect:
         manager.disconnect(websocket, session_id)
         
         # Notify other connections about the disconnect
-        disconnect_message = WebSocketMessage(
-            type="user_disconnected",
+        disconnect_message = make_payload(
+            "user_disconnected",
             session_id=session_id,
-            content="A user has disconnected from the interview session.",
-            timestamp=datetime.now().isoformat()
+            content="A user has disconnected from the interview session."
         )
-        await manager.send_to_session(disconnect_message.json(), session_id)
+        await manager.send_to_session(disconnect_message, session_id)
+    finally:
+        # Also runs on non-disconnect errors so the sender and per-IP slot are released
+        manager.disconnect(websocket, session_id)
 
 @router.websocket("/ws/recruiter/{recruiter_id}")
 async def websocket_recruiter_endpoint(websocket: WebSocket, recruiter_id: str):
     """
     WebSocket endpoint for recruiters to monitor active interviews
     """
-    await manager.connect(websocket, f"recruiter_{recruiter_id}")
+    if not await manager.connect(websocket, f"recruiter_{recruiter_id}"):
+        return
     
     try:
         # Send welcome message
-        welcome_message = WebSocketMessage(
-            type="system",
+        welcome_message = make_payload(
+            "system",
             content="Connected to recruiter dashboard. You'll receive real-time updates.",
-            timestamp=datetime.now().isoformat(),
             user_id=recruiter_id
         )
-        await manager.send_personal_message(welcome_message.json(), websocket)
+        await manager.send_personal_message(welcome_message, websocket)
         
         while True:
             # Wait for messages (recruiters mainly receive, don't send much)
-            data = await websocket.receive_text()
-            
             try:
-                message_data = json.loads(data)
-                
-                if message_data.get("type") == "get_active_interviews":
-                    # Send list of active interviews
-                    # This would integrate with your recruiter service
-                    active_message = WebSocketMessage(
-                        type="active_interviews",
-                        content="Active interviews data would go here",
-                        timestamp=datetime.now().isoformat(),
-                        user_id=recruiter_id
-                    )
-                    await manager.send_personal_message(active_message.json(), websocket)
-                
-            except json.JSONDecodeError:
-                error_message = WebSocketMessage(
-                    type="error",
-                    content="Invalid message format.",
-                    timestamp=datetime.now().isoformat()
-                )
-                await manager.send_personal_message(error_message.json(), websocket)
+                # Only get_active_interviews is accepted; anything else fails validation
+                await manager.receive(websocket, RECRUITER_DECODERS)
+            except msgspec.DecodeError:
+                error_message = make_payload("error", content="Invalid message format.")
+                await manager.send_personal_message(error_message, websocket)
+                continue
+            
+            # Send list of active interviews
+            # This would integrate with your recruiter service
+            active_message = make_payload(
+                "active_interviews",
+                content="Active interviews data would go here",
+                user_id=recruiter_id
+            )
+            await manager.send_personal_message(active_message, websocket)
                 
     except WebSocketDisconnect:
+        pass
+    finally:
         manager.disconnect(websocket, f"recruiter_{recruiter_id}")
 
 # Helper function to send notifications to recruiters
@@ -220,14 +370,8 @@ async def notify_recruiters(message: str, message_type: str = "notification"):
     """
     Send notifications to all connected recruiters
     """
-    recruiter_sessions = [key for key in manager.active_connections.keys() 
-                         if key.startswith("recruiter_")]
-    
-    notification = WebSocketMessage(
-        type=message_type,
-        content=message,
-        timestamp=datetime.now().isoformat()
-    )
-    
-    for session in recruiter_sessions:
-        await manager.send_to_session(notification.json(), session)
\ No newline at end of file
+    # Serialized once and reused for every recruiter session
+    notification = make_payload(message_type, content=message)
+    await asyncio.gather(
+        *(manager.send_to_session(notification, session) for session in list(manager.recruiter_sessions))
+    )
\ No newline at end of file
@@ -1,6 +1,6 @@
 from pydantic import BaseModel,EmailStr
-from pydantic import BaseModel,EmailStr
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Union
+import msgspec
 from datetime import datetime
 
 # Authentication Schemas
@@ -116,4 +116,33 @@ class PaginatedResponse(BaseModel):
     page: int
     size: int
     has_next: bool
-    has_prev: bool
\ No newline at end of file
+    has_prev: bool
+
+# Video Interview WebSocket Schemas (msgspec: decoded per frame on the hot path)
+# The "type" field selects the struct; JSON media "data" is base64 and decodes to bytes
+class AudioChunkMessage(msgspec.Struct, tag="audio_chunk", tag_field="type"):
+    data: bytes = b""
+
+class VideoFrameMessage(msgspec.Struct, tag="video_frame", tag_field="type"):
+    data: bytes = b""
+
+class TextChatMessage(msgspec.Struct, tag="text_message", tag_field="type"):
+    content: str = ""
+
+class PingMessage(msgspec.Struct, tag="ping", tag_field="type"):
+    pass
+
+class EndInterviewMessage(msgspec.Struct, tag="end_interview", tag_field="type"):
+    pass
+
+VideoClientMessage = Union[AudioChunkMessage, VideoFrameMessage, TextChatMessage, PingMessage, EndInterviewMessage]
+
+# Chat/recruiter WebSocket client messages (msgspec, same tagging as above)
+class UserChatMessage(msgspec.Struct, tag="user_message", tag_field="type"):
+    content: str = ""
+    user_id: str = "applicant"
+
+class GetActiveInterviewsMessage(msgspec.Struct, tag="get_active_interviews", tag_field="type"):
+    pass
+
+ChatClientMessage = Union[UserChatMessage, PingMessage, EndInterviewMessage]
@@ -1,27 +1,114 @@
-import PyPDF2
+import pymupdf
 import docx
 import re
-from typing import Dict, List
+from typing import Dict, List, Optional
 from fastapi import UploadFile
 import io
 from datetime import datetime
-from ..database import supabase_admin
+from ..database import get_supabase_admin, get_redis
 import uuid
+import os
+import asyncio
+import hashlib
+import json
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 
-async def parse_resume(file: UploadFile) -> Dict:
+RESUME_CACHE_TTL = 24 * 60 * 60
+RESUME_CACHE_SIZE = 256
+
+# List view projection: leaves the parsed_data blob (including raw_text) in the database
+RESUME_LIST_COLUMNS = "id, applicant_id, file_name, file_size, file_type, upload_timestamp, summary:parsed_data->>summary"
+
+# Parsed resumes keyed by content hash, so re-uploads of the same file skip parsing
+_resume_cache: "OrderedDict[str, Dict]" = OrderedDict()
+
+# Process pool for CPU-bound resume parsing, created in the app lifespan
+process_pool: Optional[ProcessPoolExecutor] = None
+
+def init_parse_pool():
+    """Start the resume parsing process pool"""
+    global process_pool
+    if process_pool is None:
+        process_pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+
+def shutdown_parse_pool():
+    """Stop the resume parsing process pool"""
+    global process_pool
+    if process_pool is not None:
+        process_pool.shutdown(wait=False, cancel_futures=True)
+        process_pool = None
+
+async def parse_resume(data: bytes, content_type: Optional[str] = None, filename: Optional[str] = None) -> Dict:
     """
-    Parse resume file (PDF or DOCX) and extract key information
+    Parse resume bytes (PDF or DOCX) off the event loop and extract key information
     """
-    content = ""
-    
-    # Read file content based on type
-    if file.content_type == "application/pdf":
-        content = await extract_pdf_text(file)
-    elif file.content_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-        content = await extract_docx_text(file)
+    # Sniff the %PDF header to pick the parser; content_type is unreliable
+    if data[:4] == b'%PDF':
+        kind = "pdf"
+    elif content_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document" or (filename or "").lower().endswith(".docx"):
+        kind = "docx"
     else:
         raise ValueError("Unsupported file type")
     
+    key = hashlib.blake2b(data, digest_size=16).hexdigest()
+    cached = await _get_cached_resume(key)
+    if cached is not None:
+        return cached
+    
+    if process_pool is not None:
+        loop = asyncio.get_running_loop()
+        parsed_data = await loop.run_in_executor(process_pool, _parse_bytes, data, kind)
+    else:
+        # Pool not started (e.g. service used outside the app lifespan): still keep it off the loop
+        parsed_data = await asyncio.to_thread(_parse_bytes, data, kind)
+    await _set_cached_resume(key, parsed_data)
+    return parsed_data
+
+async def _get_cached_resume(key: str) -> Optional[Dict]:
+    """Look up a parsed resume in the in-process LRU, then Redis"""
+    if key in _resume_cache:
+        _resume_cache.move_to_end(key)
+        return _resume_cache[key]
+    
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        raw = await client.get(f"resume:{key}")
+    except Exception as e:
+        print(f"Resume cache error: {e}")
+        return None
+    if raw is None:
+        return None
+    parsed_data = json.loads(raw)
+    _remember_resume(key, parsed_data)
+    return parsed_data
+
+async def _set_cached_resume(key: str, parsed_data: Dict):
+    """Store a parsed resume in the in-process LRU and Redis"""
+    _remember_resume(key, parsed_data)
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        await client.setex(f"resume:{key}", RESUME_CACHE_TTL, json.dumps(parsed_data))
+    except Exception as e:
+        print(f"Resume cache error: {e}")
+
+def _remember_resume(key: str, parsed_data: Dict):
+    _resume_cache[key] = parsed_data
+    _resume_cache.move_to_end(key)
+    if len(_resume_cache) > RESUME_CACHE_SIZE:
+        _resume_cache.popitem(last=False)
+
+def _parse_bytes(data: bytes, kind: str) -> Dict:
+    """Extract structured information from resume bytes; runs in a worker process"""
+    if kind == "pdf":
+        content = extract_pdf_text(data)
+    else:
+        content = extract_docx_text(data)
+    
     # Extract structured information
     parsed_data = {
         "raw_text": content,
@@ -34,20 +121,22 @@ async def parse_resume(file: UploadFile) -> Dict:
     
     return parsed_data
 
-async def save_resume_to_database(applicant_id: str, file: UploadFile, parsed_data: Dict) -> Dict:
+async def save_resume_to_database(applicant_id: str, file: UploadFile, parsed_data: Dict, file_size: Optional[int] = None) -> Dict:
     """
     Save parsed resume data to the database
     """
     try:
         # Generate unique ID for the resume upload
         upload_id = str(uuid.uuid4())
+        if file_size is None:
+            file_size = file.size or 0
         
         # Prepare data for database insertion
         resume_record = {
             "id": upload_id,
             "applicant_id": applicant_id,
             "file_name": file.filename or "unknown",
-            "file_size": file.size or 0,
+            "file_size": file_size,
             "file_type": file.content_type,
             "parsed_data": parsed_data,
             "upload_timestamp": datetime.now().isoformat(),
@@ -55,7 +144,7 @@ async def save_resume_to_database(applicant_id: str, file: UploadFile, parsed_da
         }
         
         # Insert into resume_uploads table using admin client
-        result = supabase_admin.table("resume_uploads").insert(resume_record).execute()
+        result = await get_supabase_admin().table("resume_uploads").insert(resume_record).execute()
         
         if result.data:
             return {
@@ -63,7 +152,7 @@ async def save_resume_to_database(applicant_id: str, file: UploadFile, parsed_da
                 "message": "Resume uploaded and parsed successfully",
                 "parsed_resume": parsed_data,
                 "file_name": file.filename or "unknown",
-                "file_size": file.size or 0,
+                "file_size": file_size,
                 "upload_timestamp": resume_record["upload_timestamp"]
             }
         else:
@@ -74,10 +163,13 @@ async def save_resume_to_database(applicant_id: str, file: UploadFile, parsed_da
 
 async def get_applicant_resumes(applicant_id: str) -> List[Dict]:
     """
-    Get all resumes uploaded by an applicant
+    Get all resumes uploaded by an applicant, newest first.
+    Only metadata and the summary are returned; use get_resume_by_id for the full parse.
     """
     try:
-        result = supabase_admin.table("resume_uploads").select("*").eq("applicant_id", applicant_id).execute()
+        result = await get_supabase_admin().table("resume_uploads").select(
+            RESUME_LIST_COLUMNS
+        ).eq("applicant_id", applicant_id).order("upload_timestamp", desc=True).execute()
         
         if result.data:
             return result.data
@@ -92,7 +184,7 @@ async def get_resume_by_id(upload_id: str) -> Dict:
     Get a specific resume by its upload ID
     """
     try:
-        result = supabase_admin.table("resume_uploads").select("*").eq("id", upload_id).single().execute()
+        result = await get_supabase_admin().table("resume_uploads").select("*").eq("id", upload_id).single().execute()
         
         if result.data:
             return result.data
@@ -107,7 +199,7 @@ async def delete_resume(upload_id: str) -> bool:
     Delete a resume by its upload ID
     """
     try:
-        result = supabase_admin.table("resume_uploads").delete().eq("id", upload_id).execute()
+        result = await get_supabase_admin().table("resume_uploads").delete().eq("id", upload_id).execute()
         
         if result.data:
             return True
@@ -117,33 +209,58 @@ async def delete_resume(upload_id: str) -> bool:
     except Exception as e:
         raise Exception(f"Error deleting resume: {str(e)}")
 
-async def extract_pdf_text(file: UploadFile) -> str:
-    """Extract text from PDF file"""
+def extract_pdf_text(content: bytes) -> str:
+    """Extract text from PDF bytes"""
     try:
-        content = await file.read()
-        pdf_file = io.BytesIO(content)
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text()
-        await file.seek(0)  # Reset file pointer
-        return text
+        with pymupdf.open(stream=content, filetype="pdf") as doc:
+            return "\n".join(page.get_text("text") for page in doc)
     except Exception as e:
         raise ValueError(f"Error reading PDF: {str(e)}")
 
-async def extract_docx_text(file: UploadFile) -> str:
-    """Extract text from DOCX file"""
+def extract_docx_text(content: bytes) -> str:
+    """Extract text from DOCX bytes"""
     try:
-        content = await file.read()
         doc = docx.Document(io.BytesIO(content))
-        text = ""
-        for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
-        await file.seek(0)  # Reset file pointer
-        return text
+        return "\n".join(paragraph.text for paragraph in doc.paragraphs)
     except Exception as e:
         raise ValueError(f"Error reading DOCX: {str(e)}")
 
+# Patterns used by the extract_* helpers, compiled once at import
+# Lines containing any of these are headers/contact details, not the candidate's name
+NAME_EXCLUDE_RE = re.compile(r'resume|cv|curriculum|@|phone|email|address', re.IGNORECASE)
+EDUCATION_RE = re.compile(
+    r'bachelor|master|phd|doctorate|associate|degree|university|college|institute|school|education',
+    re.IGNORECASE
+)
+EMAIL_RE = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b')
+PHONE_RE = re.compile(r'\b(?:\+?1[-.]?)?\(?([0-9]{3})\)?[-.]?([0-9]{3})[-.]?([0-9]{4})\b')
+# Common experience indicators: "2019 - 2021", "03/2019 – present", ...
+EXPERIENCE_RE = re.compile(
+    r'(\d{4})\s*[-–]\s*(\d{4}|present|current)|(\d{1,2}/\d{4})\s*[-–]\s*(\d{1,2}/\d{4}|present|current)',
+    re.IGNORECASE
+)
+
+# Common technical skills keywords
+SKILL_KEYWORDS = [
+    "Python", "Java", "JavaScript", "React", "Node.js", "SQL", "MongoDB",
+    "AWS", "Docker", "Kubernetes", "Git", "HTML", "CSS", "TypeScript",
+    "C++", "C#", "Ruby", "PHP", "Go", "Rust", "Swift", "Kotlin",
+    "Machine Learning", "AI", "Data Science", "Analytics", "Tableau",
+    "Excel", "PowerBI", "Agile", "Scrum", "DevOps", "Linux", "Windows"
+]
+# Names that contain a keyword but aren't a token match for it, counted as that keyword
+SKILL_ALIASES = {
+    "PostgreSQL": "SQL", "MySQL": "SQL", "NoSQL": "SQL", "SQLite": "SQL", "MSSQL": "SQL", "TSQL": "SQL",
+    "GitHub": "Git", "GitLab": "Git"
+}
+# Matches any keyword or alias as a whole token (so "Java" does not match inside "JavaScript"
+# and "Go" not inside "Google"); trailing versions like "HTML5" still match
+SKILL_RE = re.compile(
+    r'(?<![A-Za-z0-9])(' + '|'.join(map(re.escape, sorted([*SKILL_KEYWORDS, *SKILL_ALIASES], key=len, reverse=True))) + r')(?![A-Za-z+#])',
+    re.IGNORECASE
+)
+_SKILL_ALIASES_UPPER = {alias.upper(): skill.upper() for alias, skill in SKILL_ALIASES.items()}
+
 def extract_contact_info(text: str) -> Dict:
     """Extract contact information from resume text"""
     contact_info = {}
@@ -155,7 +272,7 @@ def extract_contact_info(text: str) -> Dict:
     name_candidates = []
     for i, line in enumerate(lines[:5]):  # Check first 5 lines
         # Skip lines that look like headers, emails, or phone numbers
-        if not any(keyword in line.lower() for keyword in ['resume', 'cv', 'curriculum', '@', 'phone', 'email', 'address']):
+        if not NAME_EXCLUDE_RE.search(line):
             # Look for lines with 2-4 words that could be a name
             words = line.split()
             if 2 <= len(words) <= 4 and all(word.replace('.', '').replace(',', '').isalpha() for word in words):
@@ -165,81 +282,71 @@ def extract_contact_info(text: str) -> Dict:
         contact_info["name"] = name_candidates[0]
     
     # Extract email
-    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-    emails = re.findall(email_pattern, text)
-    if emails:
-        contact_info["email"] = emails[0]
+    email = EMAIL_RE.search(text)
+    if email:
+        contact_info["email"] = email.group(0)
     
     # Extract phone number
-    phone_pattern = r'\b(?:\+?1[-.]?)?\(?([0-9]{3})\)?[-.]?([0-9]{3})[-.]?([0-9]{4})\b'
-    phones = re.findall(phone_pattern, text)
-    if phones:
-        contact_info["phone"] = f"({phones[0][0]}) {phones[0][1]}-{phones[0][2]}"
+    phone = PHONE_RE.search(text)
+    if phone:
+        contact_info["phone"] = f"({phone.group(1)}) {phone.group(2)}-{phone.group(3)}"
     
     return contact_info
 
 def extract_skills(text: str) -> List[str]:
     """Extract skills from resume text"""
-    # Common technical skills keywords
-    skill_keywords = [
-        "Python", "Java", "JavaScript", "React", "Node.js", "SQL", "MongoDB",
-        "AWS", "Docker", "Kubernetes", "Git", "HTML", "CSS", "TypeScript",
-        "C++", "C#", "Ruby", "PHP", "Go", "Rust", "Swift", "Kotlin",
-        "Machine Learning", "AI", "Data Science", "Analytics", "Tableau",
-        "Excel", "PowerBI", "Agile", "Scrum", "DevOps", "Linux", "Windows"
-    ]
-    
-    found_skills = []
-    text_upper = text.upper()
-    
-    for skill in skill_keywords:
-        if skill.upper() in text_upper:
-            found_skills.append(skill)
-    
-    return found_skills
+    # One pass over the text; results keep keyword order
+    found = {_SKILL_ALIASES_UPPER.get(match.upper(), match.upper()) for match in SKILL_RE.findall(text)}
+    return [skill for skill in SKILL_KEYWORDS if skill.upper() in found]
+
+# Resume section headings on a line of their own, mapped to a canonical section name
+SECTION_HEADINGS = {
+    "experience": "experience", "work experience": "experience", "work history": "experience",
+    "professional experience": "experience", "employment": "experience", "employment history": "experience",
+    "education": "education", "academic background": "education",
+    "skills": "skills", "technical skills": "skills",
+    "projects": "projects", "certifications": "certifications",
+    "summary": "summary", "objective": "summary"
+}
+SECTION_HEADING_RE = re.compile(
+    r"(?im)^[ \t]*(" + "|".join(sorted(map(re.escape, SECTION_HEADINGS), key=len, reverse=True)) + r")[ \t]*:?[ \t]*$"
+)
+
+def extract_section_snippet(text: str, section: str) -> Optional[str]:
+    """Return the body of a resume section (up to the next heading), or None if it has no heading"""
+    headings = list(SECTION_HEADING_RE.finditer(text))
+    for i, match in enumerate(headings):
+        if SECTION_HEADINGS[match.group(1).lower()] == section:
+            end = headings[i + 1].start() if i + 1 < len(headings) else len(text)
+            return text[match.end():end]
+    return None
 
 def extract_experience(text: str) -> List[Dict]:
     """Extract work experience from resume text"""
     # This is a simplified extraction - in production, you'd use more sophisticated NLP
     experience_sections = []
     
-    # Look for common experience indicators
-    experience_patterns = [
-        r'(\d{4})\s*[-–]\s*(\d{4}|present|current)',
-        r'(\d{1,2}/\d{4})\s*[-–]\s*(\d{1,2}/\d{4}|present|current)'
-    ]
+    # Only scan the experience section when the resume has one
+    text = extract_section_snippet(text, "experience") or text
     
     lines = text.split('\n')
     for i, line in enumerate(lines):
-        for pattern in experience_patterns:
-            if re.search(pattern, line, re.IGNORECASE):
-                # Try to extract job title and company from surrounding context
-                context = ' '.join(lines[max(0, i-2):i+3])
-                experience_sections.append({
-                    "period": line.strip(),
-                    "context": context.strip()
-                })
-                break
+        if EXPERIENCE_RE.search(line):
+            # Try to extract job title and company from surrounding context
+            context = ' '.join(lines[max(0, i-2):i+3])
+            experience_sections.append({
+                "period": line.strip(),
+                "context": context.strip()
+            })
     
     return experience_sections
 
 def extract_education(text: str) -> List[str]:
     """Extract education information from resume text"""
-    education_keywords = [
-        "Bachelor", "Master", "PhD", "Doctorate", "Associate", "Degree",
-        "University", "College", "Institute", "School", "Education"
-    ]
-    
-    education_info = []
-    lines = text.split('\n')
-    
-    for line in lines:
-        for keyword in education_keywords:
-            if keyword.lower() in line.lower():
-                education_info.append(line.strip())
-                break
+    lines = (extract_section_snippet(text, "education") or text).split('\n')
     
-    return list(set(education_info))  # Remove duplicates
+    # Remove duplicates
+    return list({line.strip() for line in lines if EDUCATION_RE.search(line)})
 
 def generate_summary(text: str) -> str:
     """Generate a brief summary of the resume"""
@@ -1,6 +1,6 @@
 from fastapi import HTTPException
 from ..schemas import RegisterRequest,LoginRequest
-from ..database import supabase, supabase_admin
+from ..database import get_supabase, get_supabase_admin
 
 async def register(email,password,user_type):
     try:
@@ -9,7 +9,7 @@ async def register(email,password,user_type):
             raise HTTPException(status_code=400, detail="user_type must be 'recruiter' or 'applicant'")
         
         # Register user with Supabase Auth
-        result = supabase.auth.sign_up({
+        result = await get_supabase().auth.sign_up({
             "email": email,
             "password": password,
         })
@@ -20,7 +20,7 @@ async def register(email,password,user_type):
             # Use service_role client for inserting into profiles table
             # This bypasses RLS policies during registration
             try:
-                profile_result = supabase_admin.table("profiles").insert({
+                profile_result = await get_supabase_admin().table("profiles").insert({
                     "id": user_id,
                     "email": email,
                     "user_type": user_type
@@ -56,7 +56,7 @@ async def register(email,password,user_type):
 
 async def login(email,password):
     try:
-        result = supabase.auth.sign_in_with_password({
+        result = await get_supabase().auth.sign_in_with_password({
             "email": email,
             "password": password,
         })
@@ -1,91 +1,372 @@
-import requests
+import httpx
+import asyncio
 import os
-import uuid
-import json
+import orjson
+import time
+import random
+import hashlib
+from collections import OrderedDict
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from dotenv import load_dotenv
-from ..database import supabase
+from ..utils import uuid7
+from ..database import get_supabase, get_redis
+from . import recruiter_service
 
 load_dotenv()
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
+GEMINI_MODEL = "gemini-2.0-flash"
+GEMINI_API_URL = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:generateContent"
+GEMINI_STREAM_URL = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:streamGenerateContent"
 
-# In-memory storage for interview sessions (in production, use database)
+GEMINI_API_BASE = "https://generativelanguage.googleapis.com/v1beta"
+GEMINI_CACHE_URL = f"{GEMINI_API_BASE}/cachedContents"
+
+# Fixed system instructions registered as Gemini cachedContents, keyed by content hash:
+# hash -> (refresh after, cachedContents name or None if caching was refused)
+CONTEXT_CACHE_TTL = 60 * 60
+# Gemini rejects cachedContents below this many tokens, so shorter instructions are sent inline
+CONTEXT_CACHE_MIN_TOKENS = 4096
+_context_caches: Dict[str, Tuple[float, Optional[str]]] = {}
+_context_cache_lock = asyncio.Lock()
+
+# Responses to byte-identical prompts (retries, report reruns) are reused instead of re-calling Gemini
+PROMPT_CACHE_TTL = 60 * 60
+PROMPT_CACHE_SIZE = 1024
+_prompt_cache: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+# Interview sessions live in Redis when REDIS_URL is set, so any worker can serve a turn:
+# "sess:{id}" holds the session fields as JSON, "sess:{id}:history" the conversation as a list
+# and "sess:{id}:transcript" the running "role: content" text used for the report.
+# Without Redis they fall back to this per-process dict (transcript kept as transcript_parts).
+SESSION_TTL = 2 * 60 * 60
 interview_sessions = {}
 
-def get_questions(prompt: str):
+# Pooled HTTP/2 client for Gemini, opened in the app lifespan
+GEMINI_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+GEMINI_LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=20)
+_http_client: Optional[httpx.AsyncClient] = None
+
+# Rate limits and transient server errors are retried with jittered exponential backoff
+GEMINI_MAX_ATTEMPTS = 3
+GEMINI_MAX_BACKOFF = 8.0
+GEMINI_RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Request bodies are serialized with orjson (much faster than httpx's stdlib json on base64 images)
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+class GeminiAPIError(Exception):
+    """Non-200 response from Gemini; callers branch on status_code rather than the message"""
+    def __init__(self, status_code: int, body: str):
+        super().__init__(f"Gemini API error: {status_code} {body}")
+        self.status_code = status_code
+
+def init_http_client() -> httpx.AsyncClient:
+    """Create the shared Gemini HTTP client if needed, and return it"""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            http2=True,
+            timeout=GEMINI_TIMEOUT,
+            limits=GEMINI_LIMITS
+        )
+    return _http_client
+
+async def close_http_client():
+    """Close the shared Gemini HTTP client"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+async def create_context_cache(system_instruction: str, model: str = GEMINI_MODEL, api_key: Optional[str] = None) -> Optional[str]:
+    """
+    Register a system instruction as Gemini cachedContents for CONTEXT_CACHE_TTL seconds
+    and return its name, or None if it is too short to cache or Gemini refuses it
+    (errors are logged, not raised)
+    """
+    # Rough token count (~4 characters per token); no request is made for text Gemini would refuse
+    if len(system_instruction) // 4 < CONTEXT_CACHE_MIN_TOKENS:
+        return None
+    init_http_client()
+    try:
+        response = await _http_client.post(GEMINI_CACHE_URL, params={"key": api_key or GEMINI_API_KEY}, json={
+            "model": f"models/{model}",
+            "systemInstruction": {"parts": [{"text": system_instruction}]},
+            "ttl": f"{CONTEXT_CACHE_TTL}s"
+        })
+        if response.status_code == 200:
+            return response.json()["name"]
+        print(f"Gemini context cache unavailable: {response.status_code} {response.text}")
+    except Exception as e:
+        print(f"Gemini context cache error: {e}")
+    return None
+
+async def delete_context_cache(name: str, api_key: Optional[str] = None):
+    """Delete a cachedContents entry that is no longer needed, so it isn't billed until its TTL runs out"""
+    init_http_client()
+    try:
+        response = await _http_client.delete(f"{GEMINI_API_BASE}/{name}", params={"key": api_key or GEMINI_API_KEY})
+        if response.status_code not in (200, 404):
+            print(f"Gemini context cache delete failed: {response.status_code} {response.text}")
+    except Exception as e:
+        print(f"Gemini context cache delete error: {e}")
+
+async def _get_context_cache(system_instruction: str) -> Optional[str]:
+    """
+    Return the cachedContents name holding this system instruction, registering it
+    with Gemini on first use and again after it expires. Returns None when caching
+    is unavailable (e.g. the text is under Gemini's minimum cacheable size), in which
+    case the caller sends the instruction inline.
+    """
+    key = hashlib.sha256(system_instruction.encode()).hexdigest()
+    entry = _context_caches.get(key)
+    if entry is not None and time.monotonic() < entry[0]:
+        return entry[1]
+    
+    async with _context_cache_lock:
+        entry = _context_caches.get(key)
+        if entry is not None and time.monotonic() < entry[0]:
+            return entry[1]
+        
+        name = await create_context_cache(system_instruction)
+        
+        # Refresh a minute before Gemini expires the entry; failures are retried after a full TTL
+        _context_caches[key] = (time.monotonic() + CONTEXT_CACHE_TTL - 60, name)
+        return name
+
+def _retry_delay(response: httpx.Response, attempt: int) -> float:
+    """Seconds to wait before retrying: the server's Retry-After if given, else 2**attempt plus jitter"""
+    retry_after = response.headers.get("retry-after", "")
+    if retry_after.isdigit():
+        return min(float(retry_after), GEMINI_MAX_BACKOFF)
+    return min(2 ** attempt + random.random(), GEMINI_MAX_BACKOFF)
+
+async def post_gemini(url: str, params: Dict, data: Dict, timeout=httpx.USE_CLIENT_DEFAULT) -> httpx.Response:
+    """POST to Gemini, retrying 429/5xx responses up to GEMINI_MAX_ATTEMPTS times"""
+    return await _request_gemini("POST", url, params, data, timeout)
+
+async def get_gemini(url: str, params: Dict) -> httpx.Response:
+    """GET from Gemini (e.g. a batch job's status), with the same retries"""
+    return await _request_gemini("GET", url, params)
+
+async def _request_gemini(method: str, url: str, params: Dict, data: Optional[Dict] = None,
+                          timeout=httpx.USE_CLIENT_DEFAULT) -> httpx.Response:
+    for attempt in range(GEMINI_MAX_ATTEMPTS):
+        response = await _http_client.request(
+            method, url, params=params, timeout=timeout,
+            content=orjson.dumps(data) if data is not None else None,
+            headers=JSON_HEADERS if data is not None else None
+        )
+        if response.status_code not in GEMINI_RETRY_STATUSES or attempt == GEMINI_MAX_ATTEMPTS - 1:
+            return response
+        delay = _retry_delay(response, attempt)
+        print(f"Gemini API returned {response.status_code}, retrying in {delay:.1f}s")
+        await asyncio.sleep(delay)
+
+def history_contents(history: List[Dict]) -> List[Dict]:
+    """Convert conversation_history entries into Gemini multi-turn contents"""
+    contents = [
+        {"role": "model" if msg["role"] == "assistant" else "user", "parts": [{"text": msg["content"]}]}
+        for msg in history
+    ]
+    # Conversations open with the interviewer; give Gemini the user turn that prompted it
+    if contents and contents[0]["role"] == "model":
+        contents.insert(0, {"role": "user", "parts": [{"text": "Please begin the interview."}]})
+    return contents
+
+async def _build_request(prompt: str, system_instruction: Optional[str], history: Optional[List[Dict]]) -> Tuple[str, Dict]:
+    """Build the Gemini request body and its prompt-cache key"""
+    contents = history_contents(history) if history else []
+    contents.append({"role": "user", "parts": [{"text": prompt}]})
+    key = hashlib.sha256(
+        f"{GEMINI_MODEL}\0{system_instruction or ''}\0".encode() + orjson.dumps(contents)
+    ).hexdigest()
+    
+    data = {"contents": contents}
+    if system_instruction:
+        cached_content = await _get_context_cache(system_instruction)
+        if cached_content:
+            data["cachedContent"] = cached_content
+        else:
+            data["systemInstruction"] = {"parts": [{"text": system_instruction}]}
+    return key, data
+
+def _cached_prompt(key: str) -> Optional[str]:
+    """Return a fresh cached response for this prompt key, if any"""
+    cached = _prompt_cache.get(key)
+    if cached is not None and time.monotonic() - cached[0] < PROMPT_CACHE_TTL:
+        _prompt_cache.move_to_end(key)
+        return cached[1]
+    return None
+
+def _store_prompt(key: str, generated_text: str):
+    """Remember a response, evicting the least recently used entry past PROMPT_CACHE_SIZE"""
+    _prompt_cache[key] = (time.monotonic(), generated_text)
+    _prompt_cache.move_to_end(key)
+    if len(_prompt_cache) > PROMPT_CACHE_SIZE:
+        _prompt_cache.popitem(last=False)
+
+async def get_questions(prompt: str, system_instruction: Optional[str] = None, history: Optional[List[Dict]] = None):
     """
     Calls Gemini API with the given prompt and returns the generated questions.
+    A fixed system_instruction is served from Gemini's context cache when possible;
+    earlier turns in history are sent as multi-turn contents ahead of the prompt.
     """
-    headers = {
-        "Content-Type": "application/json"
-    }
+    init_http_client()
+    key, data = await _build_request(prompt, system_instruction, history)
+    cached = _cached_prompt(key)
+    if cached is not None:
+        return cached
+    
     params = {
         "key": GEMINI_API_KEY
     }
-    data = {
-        "contents": [
-            {
-                "parts": [
-                    {"text": prompt}
-                ]
-            }
-        ]
-    }
-    response = requests.post(GEMINI_API_URL, headers=headers, params=params, json=data)
+    response = await post_gemini(GEMINI_API_URL, params, data)
     if response.status_code != 200:
-        raise Exception(f"Gemini API error: {response.status_code} {response.text}")
+        raise GeminiAPIError(response.status_code, response.text)
     result = response.json()
     # Extract the generated text from the response
     try:
         generated_text = result["candidates"][0]["content"]["parts"][0]["text"]
-        return generated_text
     except (KeyError, IndexError):
         raise Exception("Unexpected Gemini API response format")
+    
+    _store_prompt(key, generated_text)
+    return generated_text
 
-async def initiate_interview(applicant_id: str, resume_data: Optional[Dict] = None) -> Dict:
+async def stream_questions(prompt: str, system_instruction: Optional[str] = None, history: Optional[List[Dict]] = None):
     """
-    Start a new interview session for an applicant
+    Same as get_questions, but yields the text as Gemini generates it (server-sent events
+    from streamGenerateContent). Closing the generator early cancels the Gemini request.
     """
-    session_id = str(uuid.uuid4())
+    init_http_client()
+    key, data = await _build_request(prompt, system_instruction, history)
+    cached = _cached_prompt(key)
+    if cached is not None:
+        yield cached
+        return
     
-    # Create initial interview context based on resume
-    candidate_name = ""
-    if resume_data and resume_data.get('contact_info', {}).get('name'):
-        candidate_name = resume_data['contact_info']['name']
-    
-    context = f"""
-    You are an AI interviewer conducting a professional job interview. 
-    You should act like a human recruiter - be friendly, professional, and engaging.
-    
-    Interview Guidelines:
-    1. Start with a warm greeting and introduction
-    2. Use the candidate's actual name if provided: {candidate_name if candidate_name else '[Candidate Name]'}
-    3. Ask relevant questions based on the candidate's resume
-    4. Follow up on answers with deeper questions
-    5. Assess technical skills, experience, and cultural fit
-    6. Keep the conversation natural and flowing
-    7. Be encouraging and positive
+    params = {
+        "key": GEMINI_API_KEY,
+        "alt": "sse"
+    }
+    chunks = []
+    async for text in stream_gemini(GEMINI_STREAM_URL, params, data):
+        chunks.append(text)
+        yield text
     
+    if not chunks:
+        raise Exception("Unexpected Gemini API response format")
+    _store_prompt(key, "".join(chunks))
+
+async def stream_gemini(url: str, params: Dict, data: Dict):
+    """
+    POST to a Gemini streamGenerateContent URL (params must include alt=sse) and yield
+    the text of each chunk. 429/5xx responses are retried before anything is yielded.
+    """
+    body = orjson.dumps(data)
+    for attempt in range(GEMINI_MAX_ATTEMPTS):
+        async with _http_client.stream("POST", url, params=params, content=body, headers=JSON_HEADERS) as response:
+            # Nothing has been yielded before the status is known, so a rejected stream can be retried
+            if response.status_code in GEMINI_RETRY_STATUSES and attempt < GEMINI_MAX_ATTEMPTS - 1:
+                delay = _retry_delay(response, attempt)
+            else:
+                if response.status_code != 200:
+                    error_body = await response.aread()
+                    raise GeminiAPIError(response.status_code, error_body.decode(errors='replace'))
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    try:
+                        parts = orjson.loads(line[5:])["candidates"][0]["content"]["parts"]
+                    except (orjson.JSONDecodeError, KeyError, IndexError):
+                        # Chunks without content (e.g. the final finishReason/usage chunk)
+                        continue
+                    text = "".join(part.get("text", "") for part in parts)
+                    if text:
+                        yield text
+                return
+        print(f"Gemini API returned {response.status_code}, retrying in {delay:.1f}s")
+        await asyncio.sleep(delay)
+
+INTERVIEWER_GUIDELINES = """
+You are an AI interviewer conducting a professional job interview. 
+You should act like a human recruiter - be friendly, professional, and engaging.
+
+Interview Guidelines:
+1. Start with a warm greeting and introduction
+2. Use the candidate's actual name if it is provided in the candidate information
+3. Ask relevant questions based on the candidate's resume
+4. Follow up on answers with deeper questions
+5. Assess technical skills, experience, and cultural fit
+6. Keep the conversation natural and flowing
+7. Be encouraging and positive
+"""
+
+INTERVIEWER_FOLLOWUP_GUIDELINES = INTERVIEWER_GUIDELINES + """
+The conversation so far is provided as alternating turns; the latest turn is the candidate's answer.
+
+Provide a thoughtful follow-up question or response. Consider:
+1. Acknowledge their answer appropriately
+2. Ask a relevant follow-up question
+3. Dive deeper into their experience or skills
+4. Keep the conversation natural and engaging
+5. If this seems like a good stopping point, you can wrap up the interview
+
+Respond as the interviewer would in a real interview.
+"""
+
+# Only the candidate details vary per call; the guidelines go out as a cached system instruction
+CANDIDATE_CONTEXT_TEMPLATE = """
     Candidate Information:
-    Name: {candidate_name if candidate_name else 'Not provided'}
-    Resume Summary: {resume_data.get('summary', 'No resume provided') if resume_data else 'No resume provided'}
-    Skills: {', '.join(resume_data.get('skills', [])) if resume_data else 'Not specified'}
-    Experience: {len(resume_data.get('experience', [])) if resume_data else 0} experience entries found
+    Name: {name}
+    Resume Summary: {summary}
+    Skills: {skills}
+    Experience: {n_exp} experience entries found
     
     Start the interview with a professional greeting using the candidate's name (if available) and your first question.
     """
+
+# Earlier messages sent with each follow-up turn
+HISTORY_WINDOW = 10
+
+async def initiate_interview(applicant_id: str, resume_data: Optional[Dict] = None) -> Dict:
+    """
+    Start a new interview session for an applicant
+    """
+    session_id = str(uuid7())
+    
+    # Create initial interview context based on resume
+    resume = resume_data or {}
+    context = CANDIDATE_CONTEXT_TEMPLATE.format(
+        name=resume.get('contact_info', {}).get('name') or 'Not provided',
+        summary=resume.get('summary', 'No resume provided'),
+        skills=', '.join(resume.get('skills', [])) if resume_data else 'Not specified',
+        n_exp=len(resume.get('experience', []))
+    )
+    
+    # Store in database while the AI generates the opening question
+    start_time = datetime.now().isoformat()
+    session_insert = asyncio.create_task(_insert_session(session_id, applicant_id, start_time, resume_data))
     
     # Get initial question from AI
-    initial_response = get_questions(context)
+    try:
+        initial_response = await get_questions(context, system_instruction=INTERVIEWER_GUIDELINES)
+    except Exception:
+        # The interview never started; don't leave the row looking active
+        await session_insert
+        await _cancel_session(session_id)
+        raise
+    await session_insert
+    await recruiter_service.invalidate_report_caches()
     
     # Store session data
     session_data = {
         "session_id": session_id,
         "applicant_id": applicant_id,
-        "start_time": datetime.now().isoformat(),
+        "start_time": start_time,
         "resume_data": resume_data,
         "conversation_history": [
             {"role": "assistant", "content": initial_response, "timestamp": datetime.now().isoformat()}
@@ -93,138 +374,259 @@ async def initiate_interview(applicant_id: str, resume_data: Optional[Dict] = No
         "status": "active"
     }
     
-    interview_sessions[session_id] = session_data
+    await _create_session(session_data)
     
-    # Store in database
+    return {
+        "session_id": session_id,
+        "message": initial_response,
+        "status": "active"
+    }
+
+def _transcript_lines(messages) -> List[str]:
+    """Format messages the way the report prompt expects the conversation"""
+    return [f"{msg['role']}: {msg['content']}\n" for msg in messages]
+
+async def _create_session(session: Dict):
+    """Store a new session and its opening conversation history"""
+    client = get_redis()
+    if client is None:
+        session["transcript_parts"] = _transcript_lines(session["conversation_history"])
+        interview_sessions[session["session_id"]] = session
+        return
+    
+    key = f"sess:{session['session_id']}"
+    fields = {k: v for k, v in session.items() if k != "conversation_history"}
+    async with client.pipeline(transaction=True) as pipe:
+        pipe.set(key, orjson.dumps(fields), ex=SESSION_TTL)
+        pipe.delete(f"{key}:history")
+        pipe.set(f"{key}:transcript", "".join(_transcript_lines(session["conversation_history"])), ex=SESSION_TTL)
+        if session["conversation_history"]:
+            pipe.rpush(f"{key}:history", *[orjson.dumps(msg) for msg in session["conversation_history"]])
+            pipe.expire(f"{key}:history", SESSION_TTL)
+        await pipe.execute()
+
+async def _load_session(session_id: str, history_tail: Optional[int] = None) -> Optional[Dict]:
+    """
+    Fetch a session, or None if it doesn't exist. With history_tail only the last
+    that many messages are loaded into conversation_history.
+    """
+    client = get_redis()
+    if client is None:
+        return interview_sessions.get(session_id)
+    
+    key = f"sess:{session_id}"
+    async with client.pipeline(transaction=False) as pipe:
+        pipe.get(key)
+        pipe.lrange(f"{key}:history", -history_tail if history_tail else 0, -1)
+        raw, history = await pipe.execute()
+    if raw is None:
+        return None
+    session = orjson.loads(raw)
+    session["conversation_history"] = [orjson.loads(msg) for msg in history]
+    return session
+
+async def _update_session(session: Dict):
+    """Persist changed session fields (not the history) and refresh the TTL"""
+    client = get_redis()
+    if client is None:
+        return  # the in-process session was modified in place
+    
+    key = f"sess:{session['session_id']}"
+    fields = {k: v for k, v in session.items() if k != "conversation_history"}
+    async with client.pipeline(transaction=True) as pipe:
+        pipe.set(key, orjson.dumps(fields), ex=SESSION_TTL)
+        pipe.expire(f"{key}:history", SESSION_TTL)
+        pipe.expire(f"{key}:transcript", SESSION_TTL)
+        await pipe.execute()
+
+async def _append_history(session: Dict, *messages: Dict):
+    """
+    Append messages to a session's history and running transcript; O(1) RPUSH/APPEND
+    instead of rewriting the session
+    """
+    session["conversation_history"].extend(messages)
+    client = get_redis()
+    if client is None:
+        session["transcript_parts"].extend(_transcript_lines(messages))
+        return
+    
+    key = f"sess:{session['session_id']}"
+    async with client.pipeline(transaction=True) as pipe:
+        pipe.rpush(f"{key}:history", *[orjson.dumps(msg) for msg in messages])
+        pipe.append(f"{key}:transcript", "".join(_transcript_lines(messages)))
+        pipe.expire(f"{key}:history", SESSION_TTL)
+        pipe.expire(f"{key}:transcript", SESSION_TTL)
+        pipe.expire(key, SESSION_TTL)
+        await pipe.execute()
+
+async def _load_transcript(session: Dict) -> str:
+    """The conversation as "role: content" lines, maintained as turns are appended"""
+    client = get_redis()
+    if client is None:
+        return "".join(session["transcript_parts"])
+    
+    transcript = await client.get(f"sess:{session['session_id']}:transcript")
+    return transcript.decode() if transcript else ""
+
+async def _insert_session(session_id: str, applicant_id: str, start_time: str, resume_data: Optional[Dict]):
+    """Create the interview_sessions row; errors are logged, not raised"""
     try:
-        supabase.table("interview_sessions").insert({
+        await get_supabase().table("interview_sessions").insert({
             "id": session_id,
             "applicant_id": applicant_id,
-            "start_time": session_data["start_time"],
-            "resume_data": json.dumps(resume_data) if resume_data else None,
+            "start_time": start_time,
+            "resume_data": orjson.dumps(resume_data).decode() if resume_data else None,
             "status": "active"
         }).execute()
     except Exception as e:
         print(f"Database error: {e}")  # In production, use proper logging
-    
-    return {
-        "session_id": session_id,
-        "message": initial_response,
-        "status": "active"
-    }
+
+async def _cancel_session(session_id: str):
+    """Mark a session whose opening question failed as cancelled; errors are logged, not raised"""
+    try:
+        await get_supabase().table("interview_sessions").update({
+            "status": "cancelled"
+        }).eq("id", session_id).execute()
+    except Exception as e:
+        print(f"Database error: {e}")  # In production, use proper logging
 
 async def process_answer_and_get_next(session_id: str, answer: str) -> Dict:
     """
     Process applicant's answer and generate next question
     """
-    if session_id not in interview_sessions:
+    # Only the recent turns are sent to Gemini
+    session = await _load_session(session_id, history_tail=HISTORY_WINDOW)
+    if session is None:
         raise Exception("Interview session not found")
     
-    session = interview_sessions[session_id]
-    
-    # Add applicant's answer to conversation history
-    session["conversation_history"].append({
-        "role": "user",
-        "content": answer,
-        "timestamp": datetime.now().isoformat()
-    })
-    
-    # Build context for next question
-    conversation_context = "\n".join([
-        f"{msg['role']}: {msg['content']}" for msg in session["conversation_history"][-5:]  # Last 5 messages
-    ])
-    
-    prompt = f"""
-    Continue this job interview conversation. You are the interviewer.
-    
-    Previous conversation:
-    {conversation_context}
+    # Get AI response: recent turns go out as multi-turn contents, so the shared prefix
+    # is stable from turn to turn and the instructions are a cached system instruction
+    answered_at = datetime.now().isoformat()
+    ai_response = await get_questions(
+        answer,
+        system_instruction=INTERVIEWER_FOLLOWUP_GUIDELINES,
+        history=session["conversation_history"][-HISTORY_WINDOW:]
+    )
     
-    The candidate just answered: "{answer}"
+    await _record_turn(session, answer, answered_at, ai_response)
     
-    Provide a thoughtful follow-up question or response. Consider:
-    1. Acknowledge their answer appropriately
-    2. Ask a relevant follow-up question
-    3. Dive deeper into their experience or skills
-    4. Keep the conversation natural and engaging
-    5. If this seems like a good stopping point, you can wrap up the interview
-    
-    Respond as the interviewer would in a real interview.
+    return {
+        "session_id": session_id,
+        "message": ai_response,
+        "status": session["status"]
+    }
+
+async def stream_answer_and_get_next(session_id: str, answer: str):
     """
+    Process applicant's answer and yield the next question as it is generated.
+    The turn is saved once the full response has been received.
+    """
+    session = await _load_session(session_id, history_tail=HISTORY_WINDOW)
+    if session is None:
+        raise Exception("Interview session not found")
     
-    # Get AI response
-    ai_response = get_questions(prompt)
-    
-    # Add AI response to conversation history
-    session["conversation_history"].append({
+    answered_at = datetime.now().isoformat()
+    chunks = []
+    async for text in stream_questions(
+        answer,
+        system_instruction=INTERVIEWER_FOLLOWUP_GUIDELINES,
+        history=session["conversation_history"][-HISTORY_WINDOW:]
+    ):
+        chunks.append(text)
+        yield text
+    
+    await _record_turn(session, answer, answered_at, "".join(chunks))
+
+async def _record_turn(session: Dict, answer: str, answered_at: str, ai_response: str):
+    """Add the answer and the interviewer's reply to the session history and the database"""
+    responded_at = datetime.now().isoformat()
+    await _append_history(session, {
+        "role": "user",
+        "content": answer,
+        "timestamp": answered_at
+    }, {
         "role": "assistant",
         "content": ai_response,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": responded_at
     })
     
-    # Update database
+    # Update database: both turns in one insert
     try:
-        supabase.table("interview_messages").insert({
-            "session_id": session_id,
-            "role": "user",
-            "content": answer,
-            "timestamp": datetime.now().isoformat()
-        }).execute()
-        
-        supabase.table("interview_messages").insert({
-            "session_id": session_id,
-            "role": "assistant",
-            "content": ai_response,
-            "timestamp": datetime.now().isoformat()
-        }).execute()
+        await get_supabase().table("interview_messages").insert([
+            {
+                "session_id": session["session_id"],
+                "role": "user",
+                "content": answer,
+                "timestamp": answered_at
+            },
+            {
+                "session_id": session["session_id"],
+                "role": "assistant",
+                "content": ai_response,
+                "timestamp": responded_at
+            }
+        ]).execute()
     except Exception as e:
         print(f"Database error: {e}")
-    
-    return {
-        "session_id": session_id,
-        "message": ai_response,
-        "status": session["status"]
-    }
+
+REPORT_RUBRIC = """
+You assess job interview conversations for recruiters. Each request names the report
+sections to write; write exactly those, as part of a professional interview assessment report.
+
+Criteria for each section:
+
+- **Overall Performance**: Rate the candidate's overall interview performance (1-10)
+- **Communication Skills**: Assess clarity, articulation, and professionalism
+- **Technical Competency**: Evaluate technical knowledge and skills demonstrated
+- **Experience Relevance**: How well their experience matches the role
+- **Cultural Fit**: Assessment of personality and cultural alignment
+- **Strengths**: Key strengths demonstrated during the interview
+- **Areas for Improvement**: Constructive feedback and development areas
+- **Recommendation**: Hire/Don't Hire with reasoning
+- **Summary**: Brief overall summary and key takeaways
+"""
+
+# Rubric sections requested per Gemini call in generate_report, in report order. The rating,
+# recommendation and summary share a call so the verdict is consistent with the score.
+REPORT_SECTION_GROUPS = [
+    "Overall Performance, Recommendation, Summary",
+    "Communication Skills, Technical Competency",
+    "Experience Relevance, Cultural Fit",
+    "Strengths, Areas for Improvement"
+]
+REPORT_SECTION_PROMPT = """
+Interview Conversation:
+{conversation}
+
+Write only these sections of the report: {sections}
+"""
 
 async def generate_report(session_id: str) -> Dict:
     """
     Generate interview report and analysis
     """
-    if session_id not in interview_sessions:
+    session = await _load_session(session_id)
+    if session is None:
         raise Exception("Interview session not found")
     
-    session = interview_sessions[session_id]
     session["status"] = "completed"
     session["end_time"] = datetime.now().isoformat()
-    
-    # Build conversation for analysis
-    conversation_text = "\n".join([
-        f"{msg['role']}: {msg['content']}" for msg in session["conversation_history"]
-    ])
-    
-    # Generate comprehensive report using AI
-    report_prompt = f"""
-    Analyze this job interview conversation and provide a comprehensive report.
-    
-    Interview Conversation:
-    {conversation_text}
-    
-    Please provide a detailed assessment including:
-    
-    1. **Overall Performance**: Rate the candidate's overall interview performance (1-10)
-    2. **Communication Skills**: Assess clarity, articulation, and professionalism
-    3. **Technical Competency**: Evaluate technical knowledge and skills demonstrated
-    4. **Experience Relevance**: How well their experience matches the role
-    5. **Cultural Fit**: Assessment of personality and cultural alignment
-    6. **Strengths**: Key strengths demonstrated during the interview
-    7. **Areas for Improvement**: Constructive feedback and development areas
-    8. **Recommendation**: Hire/Don't Hire with reasoning
-    9. **Summary**: Brief overall summary and key takeaways
-    
-    Format the response as a professional interview assessment report.
-    """
-    
-    report_content = get_questions(report_prompt)
+    await _update_session(session)
+    
+    # Conversation for analysis, kept up to date turn by turn
+    conversation_text = await _load_transcript(session)
+    
+    # Generate comprehensive report using AI; the rubric is a cached system instruction,
+    # and reruns on an unchanged transcript are served from the prompt cache.
+    # Each group of rubric sections is generated concurrently, so the wait is the slowest call, not the sum
+    section_reports = await asyncio.gather(*(
+        get_questions(
+            REPORT_SECTION_PROMPT.format(conversation=conversation_text, sections=sections),
+            system_instruction=REPORT_RUBRIC
+        )
+        for sections in REPORT_SECTION_GROUPS
+    ))
+    report_content = "\n\n".join(section.strip() for section in section_reports)
     
     # Create report data
     report_data = {
@@ -239,8 +641,8 @@ async def generate_report(session_id: str) -> Dict:
     
     # Store report in database
     try:
-        supabase.table("interview_reports").insert({
-            "id": str(uuid.uuid4()),
+        await _save_report({
+            "id": str(uuid7()),
             "session_id": session_id,
             "applicant_id": session["applicant_id"],
             "report_content": report_content,
@@ -248,19 +650,31 @@ async def generate_report(session_id: str) -> Dict:
             "total_questions": report_data["total_questions"],
             "generated_at": report_data["generated_at"],
             "status": "completed"
-        }).execute()
-        
-        # Update session status
-        supabase.table("interview_sessions").update({
-            "status": "completed",
-            "end_time": session["end_time"]
-        }).eq("id", session_id).execute()
+        }, session["end_time"])
         
+        await recruiter_service.invalidate_report_caches()
     except Exception as e:
         print(f"Database error: {e}")
     
     return report_data
 
+async def _save_report(report_row: Dict, end_time: str):
+    """Insert the report and mark its session completed in one complete_interview RPC call"""
+    try:
+        await get_supabase().rpc("complete_interview", {"p_report": report_row, "p_end_time": end_time}).execute()
+        return
+    except Exception as e:
+        # RPC not deployed yet (see DATABASE_SCHEMA.md); fall back to two writes
+        print(f"Warning: complete_interview RPC unavailable, writing report and session separately: {e}")
+    
+    await get_supabase().table("interview_reports").insert(report_row).execute()
+    
+    # Update session status
+    await get_supabase().table("interview_sessions").update({
+        "status": "completed",
+        "end_time": end_time
+    }).eq("id", report_row["session_id"]).execute()
+
 def calculate_duration(start_time: str, end_time: str) -> str:
     """
     Calculate interview duration in minutes
@@ -1,64 +1,110 @@
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional, Tuple
 from datetime import datetime
-from ..database import supabase
+import time
+import asyncio
+from ..database import get_supabase, get_redis
 
-async def get_all_reports() -> List[Dict]:
+# Reports are read through the v_interview_reports view (see DATABASE_SCHEMA.md), which
+# already joins the session start time and uses the API field names, so rows are returned as-is
+REPORTS_VIEW = "v_interview_reports"
+REPORT_COLUMNS = (
+    "report_id, session_id, applicant_id, interview_date, duration, total_questions, "
+    "report_content, generated_at, status"
+)
+
+# Text search configuration used to build interview_reports.content_tsv
+SEARCH_CONFIG = "english"
+
+# Read-mostly recruiter views are cached briefly; they're hit on every dashboard load.
+# Each entry records the cache version it was computed under, and
+# invalidate_report_caches() bumps the version when sessions or reports are written.
+# With Redis the version lives there, so a write on one worker invalidates all of them.
+CACHE_TTL = 30
+CACHE_VERSION_KEY = "recruiter:cache_version"
+_cache: Dict[str, Tuple[float, int, Any]] = {}
+_cache_version = 0
+
+async def _current_version() -> int:
+    client = get_redis()
+    if client is None:
+        return _cache_version
+    try:
+        return int(await client.get(CACHE_VERSION_KEY) or 0)
+    except Exception as e:
+        print(f"Cache version lookup failed: {e}")
+        return _cache_version
+
+def _cache_get(key: str, version: int) -> Optional[Any]:
+    entry = _cache.get(key)
+    if entry is None or entry[1] != version or time.monotonic() - entry[0] >= CACHE_TTL:
+        return None
+    return entry[2]
+
+def _cache_set(key: str, version: int, value: Any):
+    _cache[key] = (time.monotonic(), version, value)
+
+async def invalidate_report_caches():
+    """Invalidate cached reports and statistics after an interview starts or finishes"""
+    global _cache_version
+    _cache_version += 1
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        await client.incr(CACHE_VERSION_KEY)
+    except Exception as e:
+        print(f"Cache version bump failed: {e}")
+
+async def get_all_reports(limit: int = 50, cursor: Optional[str] = None) -> Dict:
     """
-    Get all interview reports for recruiters to review
+    Get one page of completed interview reports for recruiters to review, newest first.
+    Pass the returned next_cursor to fetch the following page; it is None on the last page.
     """
+    cache_key = f"all_reports:{limit}"
+    version = await _current_version()
+    if cursor is None:
+        cached = _cache_get(cache_key, version)
+        if cached is not None:
+            return cached
+    
     try:
-        # Fetch all completed interview reports
-        response = supabase.table("interview_reports").select(
-            "*, interview_sessions(applicant_id, start_time, end_time)"
-        ).eq("status", "completed").order("generated_at", desc=True).execute()
+        # Keyset pagination on (generated_at, report_id): each page is an index range scan, however deep
+        db_query = get_supabase().table(REPORTS_VIEW).select(REPORT_COLUMNS).eq("status", "completed")
+        if cursor:
+            generated_at, _, report_id = cursor.rpartition("|")
+            generated_at, report_id = _quote_filter_value(generated_at), _quote_filter_value(report_id)
+            db_query = db_query.or_(
+                f"generated_at.lt.{generated_at},and(generated_at.eq.{generated_at},report_id.lt.{report_id})"
+            )
+        response = await db_query.order("generated_at", desc=True).order("report_id", desc=True).limit(limit).execute()
         
         reports = response.data if response.data else []
         
-        # Format reports for better presentation
-        formatted_reports = []
-        for report in reports:
-            formatted_report = {
-                "report_id": report["id"],
-                "session_id": report["session_id"],
-                "applicant_id": report["applicant_id"],
-                "interview_date": report.get("interview_sessions", {}).get("start_time", "Unknown"),
-                "duration": report["interview_duration"],
-                "total_questions": report["total_questions"],
-                "report_content": report["report_content"],
-                "generated_at": report["generated_at"],
-                "status": report["status"]
-            }
-            formatted_reports.append(formatted_report)
-        
-        return formatted_reports
+        next_cursor = None
+        if len(reports) == limit:
+            next_cursor = f"{reports[-1]['generated_at']}|{reports[-1]['report_id']}"
+        page = {"items": reports, "next_cursor": next_cursor}
+        
+        if cursor is None:
+            _cache_set(cache_key, version, page)
+        return page
         
     except Exception as e:
         print(f"Error fetching reports: {e}")
-        return []
+        return {"items": [], "next_cursor": None}
 
 async def get_report_by_id(report_id: str) -> Optional[Dict]:
     """
     Get a specific interview report by ID
     """
     try:
-        response = supabase.table("interview_reports").select(
-            "*, interview_sessions(applicant_id, start_time, end_time)"
-        ).eq("id", report_id).single().execute()
-        
-        if response.data:
-            report = response.data
-            return {
-                "report_id": report["id"],
-                "session_id": report["session_id"],
-                "applicant_id": report["applicant_id"],
-                "interview_date": report.get("interview_sessions", {}).get("start_time", "Unknown"),
-                "duration": report["interview_duration"],
-                "total_questions": report["total_questions"],
-                "report_content": report["report_content"],
-                "generated_at": report["generated_at"],
-                "status": report["status"]
-            }
-        return None
+        response = await get_supabase().table(REPORTS_VIEW).select(
+            REPORT_COLUMNS
+        ).eq("report_id", report_id).limit(1).execute()
+        
+        # An empty result means not found; no single-object negotiation or exception path
+        rows = response.data or []
+        return rows[0] if rows else None
         
     except Exception as e:
         print(f"Error fetching report {report_id}: {e}")
@@ -69,27 +115,11 @@ async def get_reports_by_applicant(applicant_id: str) -> List[Dict]:
     Get all interview reports for a specific applicant
     """
     try:
-        response = supabase.table("interview_reports").select(
-            "*, interview_sessions(start_time, end_time)"
+        response = await get_supabase().table(REPORTS_VIEW).select(
+            REPORT_COLUMNS
         ).eq("applicant_id", applicant_id).order("generated_at", desc=True).execute()
         
-        reports = response.data if response.data else []
-        
-        formatted_reports = []
-        for report in reports:
-            formatted_report = {
-                "report_id": report["id"],
-                "session_id": report["session_id"],
-                "interview_date": report.get("interview_sessions", {}).get("start_time", "Unknown"),
-                "duration": report["interview_duration"],
-                "total_questions": report["total_questions"],
-                "report_content": report["report_content"],
-                "generated_at": report["generated_at"],
-                "status": report["status"]
-            }
-            formatted_reports.append(formatted_report)
-        
-        return formatted_reports
+        return response.data if response.data else []
         
     except Exception as e:
         print(f"Error fetching reports for applicant {applicant_id}: {e}")
@@ -99,33 +129,26 @@ async def get_interview_statistics() -> Dict:
     """
     Get overall interview statistics for recruiters
     """
+    version = await _current_version()
+    cached = _cache_get("statistics", version)
+    if cached is not None:
+        return dict(cached)
+    
     try:
-        # Get total interviews
-        total_sessions = supabase.table("interview_sessions").select("*").execute()
-        total_count = len(total_sessions.data) if total_sessions.data else 0
-        
-        # Get completed interviews
-        completed_sessions = supabase.table("interview_sessions").select(
-            "*"
-        ).eq("status", "completed").execute()
-        completed_count = len(completed_sessions.data) if completed_sessions.data else 0
-        
-        # Get active interviews
-        active_sessions = supabase.table("interview_sessions").select(
-            "*"
-        ).eq("status", "active").execute()
-        active_count = len(active_sessions.data) if active_sessions.data else 0
+        total_count, completed_count, active_count = await _fetch_session_counts()
         
         # Calculate completion rate
         completion_rate = (completed_count / total_count * 100) if total_count > 0 else 0
         
-        return {
+        stats = {
             "total_interviews": total_count,
             "completed_interviews": completed_count,
             "active_interviews": active_count,
             "completion_rate": round(completion_rate, 2),
             "last_updated": datetime.now().isoformat()
         }
+        _cache_set("statistics", version, stats)
+        return dict(stats)
         
     except Exception as e:
         print(f"Error fetching statistics: {e}")
@@ -137,15 +160,36 @@ async def get_interview_statistics() -> Dict:
             "last_updated": datetime.now().isoformat()
         }
 
-async def search_reports(query: str, filters: Optional[Dict] = None) -> List[Dict]:
+async def _fetch_session_counts() -> Tuple[int, int, int]:
+    """Count total/completed/active sessions via the get_interview_stats RPC"""
+    try:
+        response = await get_supabase().rpc("get_interview_stats").execute()
+        row = response.data[0] if isinstance(response.data, list) else response.data
+        return int(row["total"]), int(row["completed"]), int(row["active"])
+    except Exception as e:
+        # RPC not deployed yet (see DATABASE_SCHEMA.md); fall back to client-side counting
+        print(f"Warning: get_interview_stats RPC unavailable, counting sessions directly: {e}")
+    
+    # Run the total/completed/active queries concurrently; HEAD requests return only the count header
+    total_sessions, completed_sessions, active_sessions = await asyncio.gather(
+        get_supabase().table("interview_sessions").select("id", count="exact", head=True).execute(),
+        get_supabase().table("interview_sessions").select("id", count="exact", head=True).eq("status", "completed").execute(),
+        get_supabase().table("interview_sessions").select("id", count="exact", head=True).eq("status", "active").execute()
+    )
+    total_count = total_sessions.count or 0
+    completed_count = completed_sessions.count or 0
+    active_count = active_sessions.count or 0
+    
+    return total_count, completed_count, active_count
+
+async def search_reports(query: str, filters: Optional[Dict] = None, limit: int = 50, offset: int = 0) -> Tuple[List[Dict], int]:
     """
-    Search interview reports based on query and filters
+    Search interview reports based on query and filters.
+    Filtering and pagination run in the database; returns (page, total matches).
     """
     try:
         # Start with base query
-        db_query = supabase.table("interview_reports").select(
-            "*, interview_sessions(applicant_id, start_time, end_time)"
-        )
+        db_query = get_supabase().table(REPORTS_VIEW).select(REPORT_COLUMNS, count="exact")
         
         # Apply filters if provided
         if filters:
@@ -158,38 +202,29 @@ async def search_reports(query: str, filters: Optional[Dict] = None) -> List[Dic
             if filters.get("date_to"):
                 db_query = db_query.lte("generated_at", filters["date_to"])
         
-        # Execute query
-        response = db_query.order("generated_at", desc=True).execute()
+        # Filter by text search if query provided: report text via the indexed content_tsv
+        # column (see DATABASE_SCHEMA.md), applicant IDs by substring. websearch_to_tsquery
+        # matches every term, "quoted phrases", "or" alternatives and -exclusions in one index scan
+        query = query.strip()
+        if query:
+            terms = _quote_filter_value(query)
+            pattern = _quote_filter_value(f"%{query}%")
+            db_query = db_query.or_(
+                f"content_tsv.wfts({SEARCH_CONFIG}).{terms},applicant_id.ilike.{pattern}"
+            )
+        
+        # Execute query for just the requested page
+        response = await db_query.order("generated_at", desc=True).range(offset, offset + limit - 1).execute()
         reports = response.data if response.data else []
+        total_count = response.count if response.count is not None else len(reports)
         
-        # Filter by text search if query provided
-        if query:
-            filtered_reports = []
-            query_lower = query.lower()
-            for report in reports:
-                if (query_lower in report["report_content"].lower() or 
-                    query_lower in report["applicant_id"].lower()):
-                    filtered_reports.append(report)
-            reports = filtered_reports
-        
-        # Format results
-        formatted_reports = []
-        for report in reports:
-            formatted_report = {
-                "report_id": report["id"],
-                "session_id": report["session_id"],
-                "applicant_id": report["applicant_id"],
-                "interview_date": report.get("interview_sessions", {}).get("start_time", "Unknown"),
-                "duration": report["interview_duration"],
-                "total_questions": report["total_questions"],
-                "report_content": report["report_content"],
-                "generated_at": report["generated_at"],
-                "status": report["status"]
-            }
-            formatted_reports.append(formatted_report)
-        
-        return formatted_reports
+        return reports, total_count
         
     except Exception as e:
         print(f"Error searching reports: {e}")
-        return []
\ No newline at end of file
+        return [], 0
+
+def _quote_filter_value(value: str) -> str:
+    """Quote a value for a PostgREST or=() filter so commas and parentheses are literal"""
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
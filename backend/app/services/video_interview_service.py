@@ -1,13 +1,34 @@
 import asyncio
-import json
-import base64
-import requests
+import hashlib
+import orjson
+import time
+from collections import OrderedDict, deque
 import os
-from typing import Dict, List, Optional, AsyncGenerator
+import tempfile
+import httpx
+from typing import Dict, List, Optional, Tuple, AsyncGenerator
 from datetime import datetime
-import uuid
 from dotenv import load_dotenv
-from ..database import supabase
+from ..utils import fast_iso, uuid7
+from ..database import get_supabase, get_redis
+from . import recruiter_service, interview_service
+
+# SIMD base64 (AVX2/NEON) for video frames when available
+try:
+    import pybase64
+    b64encode_as_string = pybase64.b64encode_as_string
+except ImportError:
+    import base64
+    def b64encode_as_string(data: bytes) -> str:
+        return base64.b64encode(data).decode('ascii')
+
+# OpenCV for shrinking frames before upload; frames are sent as captured without it
+try:
+    import cv2
+    import numpy as np
+    CV2_AVAILABLE = True
+except ImportError:
+    CV2_AVAILABLE = False
 
 load_dotenv()
 
@@ -15,18 +36,188 @@ load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_LIVE_API_KEY") or os.getenv("GEMINI_API_KEY")
 GEMINI_MODEL = "gemini-2.0-flash-exp"
 GEMINI_REST_URL = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:generateContent"
+GEMINI_STREAM_URL = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:streamGenerateContent"
+
+# Live video frames are buffered per session and forwarded as one multi-image request per
+# FRAME_BATCH_SIZE frames, or per whatever arrived within FRAME_FLUSH_INTERVAL seconds;
+# when the queue is full the oldest frame is dropped to keep latency bounded
+FRAME_QUEUE_SIZE = 8
+FRAME_BATCH_SIZE = 8
+FRAME_FLUSH_INTERVAL = 30.0
+
+# Recent messages sent to Gemini with each call, as multi-turn contents: the oldest are
+# dropped once the window passes CONTEXT_TOKEN_BUDGET (estimated at ~4 characters per token)
+CONTEXT_TOKEN_BUDGET = 4000
+
+# Sessions abandoned without end_video_interview (closed tab, crash) are ended and dropped
+# after VIDEO_SESSION_IDLE_TIMEOUT seconds without activity; at most MAX_VIDEO_SESSIONS are kept
+VIDEO_SESSION_IDLE_TIMEOUT = int(os.getenv("VIDEO_SESSION_IDLE_TIMEOUT", "1800"))
+MAX_VIDEO_SESSIONS = int(os.getenv("MAX_VIDEO_SESSIONS", "500"))
+
+# Gemini service tier for turns the candidate is waiting on, opt-in ("priority" = low-latency
+# queue at a higher price, downgraded to standard when over quota); empty uses the default tier
+INTERACTIVE_SERVICE_TIER = os.getenv("GEMINI_INTERACTIVE_TIER", "")
+
+# Frame analysis only annotates the history, so it can wait: "flex" runs on off-peak capacity
+# at half price with minutes of latency, hence the longer timeout for those calls
+FRAME_SERVICE_TIER = os.getenv("GEMINI_FRAME_TIER", "flex")
+FLEX_TIMEOUT = httpx.Timeout(15 * 60.0, connect=5.0)
+
+# Tiers the key or model rejected with a 400; later requests leave serviceTier out
+refused_service_tiers = set()
+
+def _drop_service_tier(data: Dict, status_code: int) -> bool:
+    """After a 400 on a request with serviceTier, remove the field (and stop sending that tier); True if removed"""
+    if status_code != 400 or "serviceTier" not in data:
+        return False
+    tier = data.pop("serviceTier")
+    refused_service_tiers.add(tier)
+    print(f"Gemini rejected service tier {tier!r}; using the default tier")
+    return True
+
+# "live" (default) analyses each frame batch during the interview; the analyses are saved with
+# the conversation and listed under "Video Observations" in the report. "batch" writes the
+# requests to a JSONL file instead and submits it as one Gemini Batch Mode job when the
+# interview ends (half price, separate rate limits, but results can take hours); a background
+# poll saves the analyses once the job finishes and regenerates the session's report.
+FRAME_ANALYSIS_MODE = os.getenv("GEMINI_FRAME_MODE", "live")
+FRAME_BATCH_MODEL = "gemini-2.0-flash"
+GEMINI_BATCH_URL = f"https://generativelanguage.googleapis.com/v1beta/models/{FRAME_BATCH_MODEL}:batchGenerateContent"
+GEMINI_BATCHES_URL = "https://generativelanguage.googleapis.com/v1beta"
+GEMINI_UPLOAD_URL = "https://generativelanguage.googleapis.com/upload/v1beta/files"
+GEMINI_DOWNLOAD_URL = "https://generativelanguage.googleapis.com/download/v1beta"
+# Requests written per stride: after each MAX_PENDING_FRAME_REQUESTS, only every other frame
+# batch is kept, so the job still spans the whole interview while the file grows slowly
+MAX_PENDING_FRAME_REQUESTS = 200
+FRAME_BATCH_POLL_INTERVAL = 60
+FRAME_BATCH_MAX_WAIT = 48 * 60 * 60  # Batch Mode targets 24 hours
+FRAME_ANALYSIS_PROMPT = (
+    "Please analyze these consecutive video frames from the interview. Comment on the candidate's "
+    "appearance, body language, and professionalism. Keep it brief."
+)
+
+# Frame analyses are stored as assistant messages with this prefix (and a closing "]")
+VIDEO_ANALYSIS_PREFIX = "[Video Analysis: "
+# interview_messages.message_type only allows text/audio/video
+MESSAGE_TYPES = {"video_analysis": "video"}
+
+# Background polls for submitted frame-analysis batch jobs (kept referenced until they finish)
+_frame_batch_polls = set()
+
+# Gemini bills images by resolution tile, so frames are shrunk to this long edge and re-encoded
+FRAME_MAX_EDGE = 512
+FRAME_JPEG_QUALITY = 70
+
+# Generated reports shared across workers through Redis, keyed by a hash of the prompt.
+# Bump REPORT_PROMPT_VERSION whenever the report prompt wording changes.
+REPORT_PROMPT_VERSION = "1"
+REPORT_CACHE_TTL = 24 * 60 * 60
+
+def _estimate_tokens(text: str) -> int:
+    """Rough token count for budgeting the history window"""
+    return len(text) // 4 + 1
+
+def _preprocess_frame(video_data: bytes) -> bytes:
+    """Downscale a JPEG frame to FRAME_MAX_EDGE and re-encode it; returns it unchanged if that fails"""
+    image = cv2.imdecode(np.frombuffer(video_data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        return video_data
+    height, width = image.shape[:2]
+    scale = FRAME_MAX_EDGE / max(height, width)
+    if scale < 1:
+        image = cv2.resize(image, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA)
+    ok, encoded = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, FRAME_JPEG_QUALITY])
+    return encoded.tobytes() if ok and len(encoded) < len(video_data) else video_data
+
+async def _encode_frames(frames: List[bytes]) -> List[str]:
+    """Shrink frames in worker threads (OpenCV releases the GIL), then base64 them"""
+    if CV2_AVAILABLE:
+        frames = await asyncio.gather(*(asyncio.to_thread(_preprocess_frame, frame) for frame in frames))
+    return [b64encode_as_string(frame) for frame in frames]
+
+def _append_bytes(path: str, data: bytes):
+    """Append data to a file (run in a worker thread)"""
+    with open(path, "ab") as f:
+        f.write(data)
+
+async def _file_chunks(path: str, chunk_size: int = 1 << 20):
+    """Read a file in chunks off the event loop, as a streamed request body"""
+    with open(path, "rb") as f:
+        while chunk := await asyncio.to_thread(f.read, chunk_size):
+            yield chunk
+
+def _message_row(session_id: str, role: str, content: str, timestamp: str,
+                 message_type: Optional[str], now: str) -> Dict:
+    """interview_messages row; message_type is left out when None (column missing)"""
+    row = {
+        "id": str(uuid7()),
+        "session_id": session_id,
+        "role": role,
+        "content": content,
+        "timestamp": timestamp,
+        "created_at": now
+    }
+    if message_type is not None:
+        row["message_type"] = MESSAGE_TYPES.get(message_type, message_type)
+    return row
+
+# Older databases lack the interview_type/message_type columns (see
+# DATABASE_MIGRATION_VIDEO_INTERVIEWS.md); each is probed once, then remembered
+_column_exists: Dict[Tuple[str, str], bool] = {}
+
+async def _has_column(table: str, column: str) -> bool:
+    """Whether table has column, checked with one empty select and cached for the process"""
+    key = (table, column)
+    if key not in _column_exists:
+        try:
+            await get_supabase().table(table).select(column).limit(0).execute()
+            _column_exists[key] = True
+        except Exception as e:
+            if column not in str(e):
+                # Not a schema answer (e.g. network error); assume present and probe again next time
+                print(f"Error checking for {table}.{column}: {e}")
+                return True
+            print(f"Warning: {table}.{column} column not found, saving without it")
+            _column_exists[key] = False
+    return _column_exists[key]
 
 class VideoInterviewSession:
     def __init__(self, session_id: str, applicant_id: str, resume_data: Optional[Dict] = None):
         self.session_id = session_id
         self.applicant_id = applicant_id
         self.resume_data = resume_data
-        self.start_time = datetime.now().isoformat()
+        # Serialized once; every save writes the same resume
+        self._resume_json = orjson.dumps(resume_data).decode() if resume_data else None
+        self.start_time = fast_iso()
         self.status = "active"
         self.conversation_history = []
+        # Sliding window of recent messages within CONTEXT_TOKEN_BUDGET; old turns fall off the left
+        self.recent_turns: deque = deque()
+        self._window_tokens = 0
+        self._saved_messages = 0
+        self.last_activity = time.monotonic()
+        # Batch Mode frame analysis requests waiting for end_interview, in a JSONL file on disk
+        self._frame_requests_path: Optional[str] = None
+        self._frame_requests_written = 0
+        self._frame_batches_seen = 0
+        self._frame_request_stride = 1
         self.is_connected = False
         self.interview_context = self._build_interview_context()
-        
+        # Inline fallback when the context cache is unavailable, built once per session
+        self._system_instruction = {"parts": [{"text": self.interview_context}]}
+        self.frame_queue: asyncio.Queue = asyncio.Queue(maxsize=FRAME_QUEUE_SIZE)
+        self._frame_task: Optional[asyncio.Task] = None
+        self._frame_buffer: List[bytes] = []
+        # Gemini cachedContents holding interview_context, so turns don't resend it
+        self.cached_context_name: Optional[str] = None
+        self._context_refresh_at = 0.0
+        
+    def touch(self):
+        """Record activity: resets the idle timer and makes this the most recently used session"""
+        self.last_activity = time.monotonic()
+        if self.session_id in active_video_sessions:
+            active_video_sessions.move_to_end(self.session_id)
+    
     def _build_interview_context(self):
         """Build the interview context for the AI"""
         candidate_name = ""
@@ -68,19 +259,14 @@ class VideoInterviewSession:
             # Test connection with a simple request
             initial_message = "Please start this video interview with a professional greeting and your first question."
             
-            response = await self._call_gemini_api(initial_message)
+            response = await self._call_gemini_api(initial_message, service_tier=INTERACTIVE_SERVICE_TIER)
             
             if response:
                 self.is_connected = True
                 print("Successfully connected to Gemini API")
                 
                 # Store the initial AI response
-                self.conversation_history.append({
-                    "role": "assistant",
-                    "content": response,
-                    "timestamp": datetime.now().isoformat(),
-                    "type": "text"
-                })
+                self._add_message("assistant", response, "text")
                 
                 return True
             else:
@@ -93,65 +279,91 @@ class VideoInterviewSession:
             self.is_connected = False
             return False
     
-    async def _call_gemini_api(self, user_message: str, image_data: Optional[str] = None) -> Optional[str]:
-        """Make a call to Gemini REST API"""
-        try:
-            headers = {
-                "Content-Type": "application/json"
-            }
-            
-            # Build conversation history for context
-            conversation_parts = []
-            
-            # Add system context
-            conversation_parts.append({
-                "text": self.interview_context
-            })
-            
-            # Add conversation history (last 5 exchanges to keep context manageable)
-            recent_history = self.conversation_history[-10:] if len(self.conversation_history) > 10 else self.conversation_history
-            
-            for msg in recent_history:
-                if msg["role"] == "user":
-                    conversation_parts.append({"text": f"Candidate: {msg['content']}"})
-                elif msg["role"] == "assistant":
-                    conversation_parts.append({"text": f"Interviewer: {msg['content']}"})
-            
-            # Add current user message
-            conversation_parts.append({"text": f"Candidate: {user_message}"})
-            
-            # Add image if provided
-            if image_data:
-                conversation_parts.append({
-                    "inlineData": {
-                        "mimeType": "image/jpeg",
-                        "data": image_data
-                    }
-                })
-            
-            data = {
-                "contents": [{
-                    "parts": conversation_parts
-                }],
-                "generationConfig": {
-                    "maxOutputTokens": 500,
-                    "temperature": 0.7,
-                    "topP": 0.8,
-                    "topK": 40
+    def _add_message(self, role: str, content: str, message_type: str):
+        """Record a message in the full history and the sliding window sent to Gemini"""
+        message = {
+            "role": role,
+            "content": content,
+            "timestamp": fast_iso(),
+            "type": message_type
+        }
+        self.conversation_history.append(message)
+        self.recent_turns.append(message)
+        self._window_tokens += _estimate_tokens(content)
+        # Always keep the newest message, even if it alone is over budget
+        while self._window_tokens > CONTEXT_TOKEN_BUDGET and len(self.recent_turns) > 1:
+            self._window_tokens -= _estimate_tokens(self.recent_turns.popleft()["content"])
+    
+    async def _get_cached_context(self) -> Optional[str]:
+        """Register interview_context with Gemini's context cache, again shortly before it expires"""
+        if time.monotonic() >= self._context_refresh_at:
+            self.cached_context_name = await interview_service.create_context_cache(
+                self.interview_context, model=GEMINI_MODEL, api_key=GEMINI_API_KEY
+            )
+            # Failed registrations are retried after a full TTL rather than on every turn
+            self._context_refresh_at = time.monotonic() + interview_service.CONTEXT_CACHE_TTL - 60
+        return self.cached_context_name
+    
+    async def _release_cached_context(self):
+        """Delete this session's context cache when the interview ends instead of leaving it to expire"""
+        name, self.cached_context_name = self.cached_context_name, None
+        if name:
+            await interview_service.delete_context_cache(name, api_key=GEMINI_API_KEY)
+    
+    async def _build_request(self, user_message: str, images: Optional[List[str]] = None,
+                             service_tier: Optional[str] = None, history: Optional[List[Dict]] = None) -> Dict:
+        """
+        Build a Gemini request body. The recent turns (history, default the sliding window)
+        go out as multi-turn contents so the prompt prefix stays the same from call to call.
+        """
+        contents = interview_service.history_contents(list(self.recent_turns) if history is None else history)
+        
+        # Current user message, with images if provided
+        user_parts = [{"text": user_message}]
+        for image_data in images or []:
+            user_parts.append({
+                "inlineData": {
+                    "mimeType": "image/jpeg",
+                    "data": image_data
                 }
+            })
+        contents.append({"role": "user", "parts": user_parts})
+        
+        data = {
+            "contents": contents,
+            "generationConfig": {
+                "maxOutputTokens": 500,
+                "temperature": 0.7,
+                "topP": 0.8,
+                "topK": 40
             }
+        }
+        
+        if service_tier and service_tier not in refused_service_tiers:
+            data["serviceTier"] = service_tier
+        
+        # The system context comes from the context cache, or inline if caching was refused
+        cached_context = await self._get_cached_context()
+        if cached_context:
+            data["cachedContent"] = cached_context
+        else:
+            data["systemInstruction"] = self._system_instruction
+        return data
+    
+    async def _call_gemini_api(self, user_message: str, images: Optional[List[str]] = None,
+                               service_tier: Optional[str] = None, history: Optional[List[Dict]] = None) -> Optional[str]:
+        """Make a call to Gemini REST API, optionally on a specific service tier"""
+        try:
+            data = await self._build_request(user_message, images, service_tier, history)
             
-            # Make async request
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                lambda: requests.post(
-                    f"{GEMINI_REST_URL}?key={GEMINI_API_KEY}",
-                    headers=headers,
-                    json=data,
-                    timeout=30
-                )
+            # Shared pooled HTTP/2 client (kept alive across calls), with 429/5xx retries
+            interview_service.init_http_client()
+            response = await interview_service.post_gemini(
+                GEMINI_REST_URL, {"key": GEMINI_API_KEY}, data,
+                timeout=FLEX_TIMEOUT if service_tier == "flex" else httpx.USE_CLIENT_DEFAULT
             )
+            if _drop_service_tier(data, response.status_code):
+                response = await interview_service.post_gemini(GEMINI_REST_URL, {"key": GEMINI_API_KEY}, data)
             
             if response.status_code == 200:
                 result = response.json()
@@ -171,66 +383,167 @@ class VideoInterviewSession:
     
     async def send_audio_chunk(self, audio_data: bytes):
         """Process audio data (Note: REST API doesn't support real-time audio streaming)"""
+        self.touch()
         # For now, we'll store audio data but not process it real-time
         # This could be enhanced to convert speech to text first
         print("Audio received but not processed in REST API mode")
         return True
     
+    def enqueue_video_frame(self, video_data: bytes) -> bool:
+        """Queue a live video frame for batched analysis, dropping the oldest if full"""
+        if not self.is_connected:
+            return False
+        self.touch()
+        
+        if self._frame_task is None or self._frame_task.done():
+            self._frame_task = asyncio.create_task(self._consume_video_frames())
+        
+        if self.frame_queue.full():
+            try:
+                self.frame_queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+        self.frame_queue.put_nowait(video_data)
+        return True
+    
+    async def _consume_video_frames(self):
+        """Drain the frame queue into _frame_buffer and forward it to Gemini once full or stale"""
+        loop = asyncio.get_running_loop()
+        try:
+            while self.is_connected:
+                self._frame_buffer.append(await self.frame_queue.get())
+                deadline = loop.time() + FRAME_FLUSH_INTERVAL
+                while len(self._frame_buffer) < FRAME_BATCH_SIZE:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        self._frame_buffer.append(await asyncio.wait_for(self.frame_queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+                frames, self._frame_buffer = self._frame_buffer, []
+                await self.send_video_frame_batch(frames)
+        except asyncio.CancelledError:
+            pass
+    
+    async def _flush_frame_buffer(self):
+        """Add frames still buffered when the interview ends to the pending frame-analysis batch"""
+        frames, self._frame_buffer = self._frame_buffer, []
+        while not self.frame_queue.empty():
+            frames.append(self.frame_queue.get_nowait())
+        if frames and FRAME_ANALYSIS_MODE == "batch":
+            await self._queue_frame_request(await _encode_frames(frames))
+    
     async def send_video_frame(self, video_data: bytes):
-        """Send video frame to Gemini API for analysis"""
+        """Send a single video frame to Gemini API for analysis"""
+        return await self.send_video_frame_batch([video_data])
+    
+    async def send_video_frame_batch(self, frames: List[bytes]):
+        """Send a batch of consecutive video frames to Gemini API in one request"""
         if not self.is_connected:
             return False
         
         try:
-            # Convert video frame to base64
-            video_b64 = base64.b64encode(video_data).decode('utf-8')
+            images = await _encode_frames(frames)
             
-            # Send to Gemini with request to analyze the video frame
+            if FRAME_ANALYSIS_MODE == "batch":
+                await self._queue_frame_request(images)
+                return True
+            
+            # Send to Gemini with request to analyze the video frames
             response = await self._call_gemini_api(
-                "Please analyze this video frame from the interview. Comment on the candidate's appearance, body language, and professionalism. Keep it brief.",
-                video_b64
+                FRAME_ANALYSIS_PROMPT,
+                images,
+                service_tier=FRAME_SERVICE_TIER
             )
             
             if response:
                 # Store the analysis
-                self.conversation_history.append({
-                    "role": "assistant",
-                    "content": f"[Video Analysis: {response}]",
-                    "timestamp": datetime.now().isoformat(),
-                    "type": "video_analysis"
-                })
+                self._add_message("assistant", f"{VIDEO_ANALYSIS_PREFIX}{response}]", "video_analysis")
                 return True
             
             return False
         except Exception as e:
-            print(f"Error sending video frame: {e}")
+            print(f"Error sending video frames: {e}")
             return False
     
+    async def _queue_frame_request(self, images: List[str]):
+        """
+        Append a frame analysis request to this session's JSONL batch file; every
+        MAX_PENDING_FRAME_REQUESTS requests, the share of frame batches kept halves
+        """
+        self._frame_batches_seen += 1
+        if (self._frame_batches_seen - 1) % self._frame_request_stride:
+            return
+        
+        parts = [{"text": FRAME_ANALYSIS_PROMPT}]
+        parts.extend({"inlineData": {"mimeType": "image/jpeg", "data": image}} for image in images)
+        line = orjson.dumps({
+            "key": f"frames_{self._frame_batches_seen:06d}",
+            "request": {
+                "contents": [{"role": "user", "parts": parts}],
+                "generationConfig": {"maxOutputTokens": 200}
+            }
+        }) + b"\n"
+        if self._frame_requests_path is None:
+            fd, self._frame_requests_path = tempfile.mkstemp(prefix=f"frames-{self.session_id}-", suffix=".jsonl")
+            os.close(fd)
+        await asyncio.to_thread(_append_bytes, self._frame_requests_path, line)
+        
+        self._frame_requests_written += 1
+        if self._frame_requests_written % MAX_PENDING_FRAME_REQUESTS == 0:
+            self._frame_request_stride *= 2
+    
+    async def _submit_frame_batch(self):
+        """
+        Upload the pending frame analyses and submit them as one Batch Mode job, then poll
+        for the results in the background; errors are logged, not raised
+        """
+        await self._flush_frame_buffer()
+        path, self._frame_requests_path = self._frame_requests_path, None
+        if path is None:
+            return
+        try:
+            file_name = await _upload_jsonl(path, f"video-frames-{self.session_id}")
+            if file_name is None:
+                return
+            response = await interview_service.post_gemini(GEMINI_BATCH_URL, {"key": GEMINI_API_KEY}, {
+                "batch": {
+                    "display_name": f"video-frames-{self.session_id}",
+                    "input_config": {"file_name": file_name}
+                }
+            })
+            if response.status_code != 200:
+                print(f"Gemini batch submit error: {response.status_code} - {response.text}")
+                return
+            task = asyncio.create_task(_poll_frame_batch(self.session_id, response.json()["name"]))
+            _frame_batch_polls.add(task)
+            task.add_done_callback(_frame_batch_polls.discard)
+        except Exception as e:
+            print(f"Error submitting frame analysis batch: {e}")
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    
     async def send_text_message(self, text: str):
         """Send text message to Gemini API"""
         if not self.is_connected:
             return False
+        self.touch()
         
         try:
-            # Store user message
-            self.conversation_history.append({
-                "role": "user",
-                "content": text,
-                "timestamp": datetime.now().isoformat(),
-                "type": "text"
-            })
+            # Store user message; it goes out as the current turn, not as history
+            history = list(self.recent_turns)
+            self._add_message("user", text, "text")
             
-            # Get AI response
-            response = await self._call_gemini_api(text)
+            # Get AI response; the candidate is waiting, so use the low-latency tier
+            response = await self._call_gemini_api(text, service_tier=INTERACTIVE_SERVICE_TIER, history=history)
             
             if response:
                 # Store AI response
-                self.conversation_history.append({
-                    "role": "assistant",
-                    "content": response,
-                    "timestamp": datetime.now().isoformat(),
-                    "type": "text"
-                })
+                self._add_message("assistant", response, "text")
                 return True
             
             return False
@@ -238,6 +551,37 @@ class VideoInterviewSession:
             print(f"Error sending text message: {e}")
             return False
     
+    async def stream_text_message(self, text: str) -> AsyncGenerator[str, None]:
+        """
+        Send a text message and yield the interviewer's reply as Gemini generates it;
+        the full reply is added to the history once the stream ends
+        """
+        if not self.is_connected:
+            raise Exception("Video interview session is not connected")
+        self.touch()
+        
+        history = list(self.recent_turns)
+        self._add_message("user", text, "text")
+        
+        data = await self._build_request(text, service_tier=INTERACTIVE_SERVICE_TIER, history=history)
+        interview_service.init_http_client()
+        for attempt in range(2):
+            chunks = []
+            try:
+                async for delta in interview_service.stream_gemini(GEMINI_STREAM_URL, {"key": GEMINI_API_KEY, "alt": "sse"}, data):
+                    chunks.append(delta)
+                    yield delta
+                break
+            except interview_service.GeminiAPIError as e:
+                # A refused tier fails before anything is streamed; retry once without it
+                if chunks or attempt or not _drop_service_tier(data, e.status_code):
+                    raise
+        
+        response = "".join(chunks).strip()
+        if not response:
+            raise Exception("No valid response from Gemini API")
+        self._add_message("assistant", response, "text")
+    
     async def get_ai_response(self) -> Optional[Dict]:
         """Get the latest AI response"""
         # Return the last assistant message
@@ -267,78 +611,89 @@ class VideoInterviewSession:
         """End the interview session"""
         try:
             self.status = "completed"
-            self.end_time = datetime.now().isoformat()
+            self.end_time = fast_iso()
             self.is_connected = False
+            if self._frame_task is not None:
+                self._frame_task.cancel()
             
-            # Update database
-            await self._save_session_to_database()
+            # Update database; frame analyses go out as one batch job
+            await asyncio.gather(
+                self._save_session_to_database(), self._submit_frame_batch(), self._release_cached_context()
+            )
             
             return True
         except Exception as e:
             print(f"Error ending interview: {e}")
             return False
     
-    async def _save_session_to_database(self):
-        """Save session data to database"""
+    async def _save_session_header(self, now: str):
+        """Upsert the interview_sessions row (interview_type only if the column exists)"""
+        session_data = {
+            "id": self.session_id,
+            "applicant_id": self.applicant_id,
+            "start_time": self.start_time,
+            "end_time": getattr(self, 'end_time', None),
+            "status": self.status,
+            "resume_data": self._resume_json,
+            "created_at": now
+        }
+        
+        if await _has_column("interview_sessions", "interview_type"):
+            session_data["interview_type"] = "video"
+        await get_supabase().table("interview_sessions").upsert(session_data).execute()
+        await recruiter_service.invalidate_report_caches()
+    
+    async def _save_messages(self, now: str):
+        """Save conversation messages not written by an earlier save, in one bulk insert"""
+        new_messages = self.conversation_history[self._saved_messages:]
+        if not new_messages:
+            return
+        
+        include_type = await _has_column("interview_messages", "message_type")
+        rows = [
+            _message_row(self.session_id, message["role"], message["content"], message["timestamp"],
+                         message.get("type", "text") if include_type else None, now)
+            for message in new_messages
+        ]
+        await get_supabase().table("interview_messages").insert(rows).execute()
+        self._saved_messages += len(new_messages)
+    
+    async def _save_session_to_database(self, include_messages: bool = True):
+        """Save session data to database; messages are skipped when the session is just starting"""
         try:
-            # Save interview session (without interview_type for now)
-            session_data = {
-                "id": self.session_id,
-                "applicant_id": self.applicant_id,
-                "start_time": self.start_time,
-                "end_time": getattr(self, 'end_time', None),
-                "status": self.status,
-                "resume_data": json.dumps(self.resume_data) if self.resume_data else None,
-                "created_at": datetime.now().isoformat()
-            }
-            
-            # Try to include interview_type if column exists
-            try:
-                session_data["interview_type"] = "video"
-                supabase.table("interview_sessions").upsert(session_data).execute()
-            except Exception as db_error:
-                # If interview_type column doesn't exist, save without it
-                if "interview_type" in str(db_error):
-                    print("Warning: interview_type column not found, saving session without it")
-                    session_data.pop("interview_type", None)
-                    supabase.table("interview_sessions").upsert(session_data).execute()
-                else:
-                    raise db_error
-            
-            # Save conversation messages
-            for message in self.conversation_history:
-                message_data = {
-                    "id": str(uuid.uuid4()),
-                    "session_id": self.session_id,
-                    "role": message["role"],
-                    "content": message["content"],
-                    "timestamp": message["timestamp"],
-                    "created_at": datetime.now().isoformat()
-                }
-                
-                # Try to include message_type if column exists
-                try:
-                    message_data["message_type"] = message.get("type", "text")
-                    supabase.table("interview_messages").insert(message_data).execute()
-                except Exception as db_error:
-                    # If message_type column doesn't exist, save without it
-                    if "message_type" in str(db_error):
-                        print("Warning: message_type column not found, saving message without it")
-                        message_data.pop("message_type", None)
-                        supabase.table("interview_messages").insert(message_data).execute()
-                    else:
-                        raise db_error
-                
+            # One timestamp for every row written by this save
+            now = fast_iso()
+            # The header goes first: messages reference the session row
+            await self._save_session_header(now)
+            if include_messages:
+                await self._save_messages(now)
         except Exception as e:
             print(f"Error saving session to database: {e}")
 
-# Global session manager
-active_video_sessions: Dict[str, VideoInterviewSession] = {}
+# Global session manager, least recently used first
+active_video_sessions: "OrderedDict[str, VideoInterviewSession]" = OrderedDict()
+_session_reaper: Optional[asyncio.Task] = None
+
+async def _evict_session(session_id: str):
+    """Drop a session from memory, ending it first so its history is saved"""
+    session = active_video_sessions.pop(session_id, None)
+    if session is not None:
+        print(f"Evicting video interview session {session_id}")
+        await session.end_interview()
+
+async def _reap_idle_sessions():
+    """End sessions idle for VIDEO_SESSION_IDLE_TIMEOUT; exits once none are left"""
+    while active_video_sessions:
+        await asyncio.sleep(min(VIDEO_SESSION_IDLE_TIMEOUT, 60))
+        cutoff = time.monotonic() - VIDEO_SESSION_IDLE_TIMEOUT
+        idle = [session_id for session_id, session in active_video_sessions.items() if session.last_activity < cutoff]
+        for session_id in idle:
+            await _evict_session(session_id)
 
 async def start_video_interview(applicant_id: str, resume_data: Optional[Dict] = None) -> Dict:
     """Start a new video interview session"""
     try:
-        session_id = str(uuid.uuid4())
+        session_id = str(uuid7())
         
         # Create new video interview session
         session = VideoInterviewSession(session_id, applicant_id, resume_data)
@@ -349,11 +704,16 @@ async def start_video_interview(applicant_id: str, resume_data: Optional[Dict] =
         if not connection_success:
             raise Exception("Failed to connect to Gemini Live API")
         
-        # Store session
+        # Store session, evicting the least recently used past the cap
         active_video_sessions[session_id] = session
+        while len(active_video_sessions) > MAX_VIDEO_SESSIONS:
+            await _evict_session(next(iter(active_video_sessions)))
+        global _session_reaper
+        if _session_reaper is None or _session_reaper.done():
+            _session_reaper = asyncio.create_task(_reap_idle_sessions())
         
-        # Save initial session to database
-        await session._save_session_to_database()
+        # Save the session row; its messages are written when the interview ends
+        await session._save_session_to_database(include_messages=False)
         
         return {
             "session_id": session_id,
@@ -367,7 +727,10 @@ async def start_video_interview(applicant_id: str, resume_data: Optional[Dict] =
 
 async def get_video_session(session_id: str) -> Optional[VideoInterviewSession]:
     """Get video interview session by ID"""
-    return active_video_sessions.get(session_id)
+    session = active_video_sessions.get(session_id)
+    if session is not None:
+        session.touch()
+    return session
 
 async def end_video_interview(session_id: str) -> Dict:
     """End a video interview session"""
@@ -378,8 +741,8 @@ async def end_video_interview(session_id: str) -> Dict:
         
         await session.end_interview()
         
-        # Remove from active sessions
-        del active_video_sessions[session_id]
+        # Remove from active sessions (the reaper may have dropped it meanwhile)
+        active_video_sessions.pop(session_id, None)
         
         return {
             "session_id": session_id,
@@ -390,11 +753,121 @@ async def end_video_interview(session_id: str) -> Dict:
     except Exception as e:
         raise Exception(f"Error ending video interview: {str(e)}")
 
-async def generate_video_interview_report(session_id: str) -> Dict:
-    """Generate comprehensive report for video interview"""
+async def _upload_jsonl(path: str, display_name: str) -> Optional[str]:
+    """Upload a JSONL file with the Gemini Files API (resumable protocol); returns its files/ name"""
+    size = os.path.getsize(path)
+    client = interview_service.init_http_client()
+    start = await client.post(GEMINI_UPLOAD_URL, params={"key": GEMINI_API_KEY}, headers={
+        "X-Goog-Upload-Protocol": "resumable",
+        "X-Goog-Upload-Command": "start",
+        "X-Goog-Upload-Header-Content-Length": str(size),
+        "X-Goog-Upload-Header-Content-Type": "jsonl"
+    }, json={"file": {"display_name": display_name}})
+    upload_url = start.headers.get("x-goog-upload-url")
+    if start.status_code != 200 or not upload_url:
+        print(f"Gemini file upload error: {start.status_code} - {start.text}")
+        return None
+    
+    response = await client.post(upload_url, headers={
+        "Content-Length": str(size),
+        "X-Goog-Upload-Offset": "0",
+        "X-Goog-Upload-Command": "upload, finalize"
+    }, content=_file_chunks(path), timeout=FLEX_TIMEOUT)
+    if response.status_code != 200:
+        print(f"Gemini file upload error: {response.status_code} - {response.text}")
+        return None
+    return response.json()["file"]["name"]
+
+async def _read_batch_output(result: Dict) -> List[str]:
+    """Analysis texts from a finished batch job's responses file, in request order"""
+    output = result.get("response") or result.get("metadata", {}).get("output", {})
+    responses_file = output.get("responsesFile")
+    if not responses_file:
+        return []
+    response = await interview_service.get_gemini(
+        f"{GEMINI_DOWNLOAD_URL}/{responses_file}:download", {"key": GEMINI_API_KEY, "alt": "media"}
+    )
+    if response.status_code != 200:
+        print(f"Gemini batch results error: {response.status_code} - {response.text}")
+        return []
+    
+    items = sorted((orjson.loads(line) for line in response.content.splitlines() if line.strip()),
+                   key=lambda item: item.get("key", ""))
+    observations = []
+    for item in items:
+        try:
+            observations.append(item["response"]["candidates"][0]["content"]["parts"][0]["text"].strip())
+        except (KeyError, IndexError, TypeError):
+            continue
+    return observations
+
+async def _poll_frame_batch(session_id: str, batch_name: str):
+    """
+    Wait for a session's frame analysis batch job, save the analyses with its messages and
+    regenerate the session's report if one was already generated without them
+    """
+    try:
+        deadline = time.monotonic() + FRAME_BATCH_MAX_WAIT
+        while True:
+            await asyncio.sleep(FRAME_BATCH_POLL_INTERVAL)
+            response = await interview_service.get_gemini(f"{GEMINI_BATCHES_URL}/{batch_name}", {"key": GEMINI_API_KEY})
+            if response.status_code == 200 and response.json().get("done"):
+                result = response.json()
+                break
+            if response.status_code != 200:
+                print(f"Gemini batch status error: {response.status_code} - {response.text}")
+            if time.monotonic() > deadline:
+                print(f"Frame analysis batch {batch_name} did not finish; giving up")
+                return
+        
+        if result.get("error"):
+            print(f"Frame analysis batch {batch_name} failed: {result['error']}")
+            return
+        observations = await _read_batch_output(result)
+        if not observations:
+            return
+        
+        now = fast_iso()
+        message_type = "video" if await _has_column("interview_messages", "message_type") else None
+        await get_supabase().table("interview_messages").insert([
+            _message_row(session_id, "assistant", f"{VIDEO_ANALYSIS_PREFIX}{text}]", now, message_type, now)
+            for text in observations
+        ]).execute()
+        
+        report = await get_supabase().table("interview_reports").select("id").eq("session_id", session_id).limit(1).execute()
+        if report.data:
+            await generate_video_interview_report(session_id, report_id=report.data[0]["id"])
+    except Exception as e:
+        print(f"Error collecting frame analysis batch {batch_name}: {e}")
+
+async def _generate_report_content(report_prompt: str) -> str:
+    """
+    Run the report prompt through Gemini, reusing an earlier result for an identical prompt
+    (regenerated reports, dashboard refreshes) from Redis or the in-process prompt cache
+    """
+    key = hashlib.blake2b(f"{REPORT_PROMPT_VERSION}\0{report_prompt}".encode(), digest_size=16).hexdigest()
+    client = get_redis()
+    if client is not None:
+        try:
+            cached = await client.get(f"video_report:{key}")
+            if cached is not None:
+                return cached.decode()
+        except Exception as e:
+            print(f"Report cache error: {e}")
+    
+    report_content = await interview_service.get_questions(report_prompt)
+    if client is not None:
+        try:
+            await client.setex(f"video_report:{key}", REPORT_CACHE_TTL, report_content)
+        except Exception as e:
+            print(f"Report cache error: {e}")
+    return report_content
+
+async def generate_video_interview_report(session_id: str, report_id: Optional[str] = None) -> Dict:
+    """Generate comprehensive report for video interview; with report_id, that report is rewritten instead"""
     try:
         # Get session data from database
-        session_response = supabase.table("interview_sessions").select("*").eq("id", session_id).single().execute()
+        session_response = await get_supabase().table("interview_sessions").select("*").eq("id", session_id).single().execute()
         
         if not session_response.data:
             raise Exception("Interview session not found")
@@ -402,18 +875,21 @@ async def generate_video_interview_report(session_id: str) -> Dict:
         session_data = session_response.data
         
         # Get conversation messages
-        messages_response = supabase.table("interview_messages").select("*").eq("session_id", session_id).order("timestamp").execute()
+        messages_response = await get_supabase().table("interview_messages").select("*").eq("session_id", session_id).order("timestamp").execute()
         
         conversation_history = messages_response.data if messages_response.data else []
         
-        # Build conversation text for analysis
+        # Build conversation text for analysis; frame analyses go to their own section
         conversation_text = "\n".join([
-            f"{msg['role']}: {msg['content']}" for msg in conversation_history if msg.get('message_type') == 'text'
+            f"{msg['role']}: {msg['content']}" for msg in conversation_history
+            if msg.get('message_type', 'text') == 'text' and not msg['content'].startswith(VIDEO_ANALYSIS_PREFIX)
         ])
+        video_observations = "\n".join(
+            f"- {msg['content'][len(VIDEO_ANALYSIS_PREFIX):].removesuffix(']')}" for msg in conversation_history
+            if msg['content'].startswith(VIDEO_ANALYSIS_PREFIX)
+        )
         
         # Use Gemini API for report generation (using regular API, not Live API)
-        from . import interview_service
-        
         report_prompt = f"""
         Analyze this VIDEO job interview conversation and provide a comprehensive report.
         
@@ -421,6 +897,9 @@ async def generate_video_interview_report(session_id: str) -> Dict:
         Interview Conversation:
         {conversation_text}
         
+        Video Observations (from frame analysis):
+        {video_observations or 'None available'}
+        
         Please provide a detailed assessment including:
         
         1. **Overall Performance**: Rate the candidate's overall interview performance (1-10)
@@ -439,7 +918,7 @@ async def generate_video_interview_report(session_id: str) -> Dict:
         Format the response as a professional video interview assessment report.
         """
         
-        report_content = interview_service.get_questions(report_prompt)
+        report_content = await _generate_report_content(report_prompt)
         
         # Calculate duration
         start_time = datetime.fromisoformat(session_data["start_time"])
@@ -449,29 +928,27 @@ async def generate_video_interview_report(session_id: str) -> Dict:
         
         # Create report data
         report_data = {
-            "id": str(uuid.uuid4()),
+            "id": report_id or str(uuid7()),
             "session_id": session_id,
             "applicant_id": session_data["applicant_id"],
             "report_content": report_content,
             "interview_duration": f"{duration_minutes} minutes",
-            "total_questions": len([msg for msg in conversation_history if msg['role'] == 'assistant']),
-            "generated_at": datetime.now().isoformat(),
+            "total_questions": len([
+                msg for msg in conversation_history
+                if msg['role'] == 'assistant' and not msg['content'].startswith(VIDEO_ANALYSIS_PREFIX)
+            ]),
+            "generated_at": fast_iso(),
             "status": "completed"
         }
         
-        # Try to include interview_type if column exists
-        try:
+        if await _has_column("interview_reports", "interview_type"):
             report_data["interview_type"] = "video"
-            supabase.table("interview_reports").insert(report_data).execute()
-        except Exception as db_error:
-            # If interview_type column doesn't exist, save without it
-            if "interview_type" in str(db_error):
-                print("Warning: interview_type column not found in reports, saving without it")
-                report_data.pop("interview_type", None)
-                supabase.table("interview_reports").insert(report_data).execute()
-            else:
-                raise db_error
+        if report_id:
+            await get_supabase().table("interview_reports").update(report_data).eq("id", report_id).execute()
+        else:
+            await get_supabase().table("interview_reports").insert(report_data).execute()
         
+        await recruiter_service.invalidate_report_caches()
         return report_data
         
     except Exception as e:
@@ -0,0 +1,56 @@
+import hashlib
+import os
+import time
+import uuid
+from datetime import datetime
+from typing import Any
+import orjson
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson; used as the app's default response class"""
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+def etag_response(request: Request, payload: Any, max_age: int = 5) -> Response:
+    """
+    Serialize payload once and return it with an ETag, or a bare 304 when the
+    client's If-None-Match already matches
+    """
+    body = orjson.dumps(payload)
+    etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={max_age}"}
+    
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if etag in candidates or "*" in candidates:
+            return Response(status_code=304, headers=headers)
+    
+    return Response(content=body, media_type="application/json", headers=headers)
+
+# Second-resolution ISO prefix, reused until the wall clock second changes
+_iso_cache = ("", 0)
+
+def fast_iso() -> str:
+    """Local ISO-8601 timestamp with millisecond precision, cheaper than datetime.now().isoformat()"""
+    global _iso_cache
+    t = time.time()
+    second = int(t)
+    prefix, cached_second = _iso_cache
+    if second != cached_second:
+        prefix = datetime.fromtimestamp(second).isoformat()
+        _iso_cache = (prefix, second)
+    return f"{prefix}.{int((t - second) * 1000):03d}"
+
+def uuid7() -> uuid.UUID:
+    """
+    Time-ordered UUID (RFC 9562 version 7): a 48-bit millisecond timestamp followed by
+    random bits, so new primary keys land at the right edge of the B-tree index
+    """
+    ms = time.time_ns() // 1_000_000
+    rand = int.from_bytes(os.urandom(10), "big")
+    rand_a = rand >> 68  # 12 bits
+    rand_b = rand & ((1 << 62) - 1)  # 62 bits
+    return uuid.UUID(int=(ms << 80) | (0x7 << 76) | (rand_a << 64) | (0b10 << 62) | rand_b)
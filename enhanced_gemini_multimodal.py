@@ -6,11 +6,16 @@ Demonstrates advanced audio and video processing with Gemini API
 
 import asyncio
 import base64
+import functools
 import json
+import orjson
 import os
-import requests
+import httpx
 import cv2
 import numpy as np
+from collections import deque
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 from dotenv import load_dotenv
@@ -21,13 +26,132 @@ GEMINI_API_KEY = os.getenv("GEMINI_LIVE_API_KEY") or os.getenv("GEMINI_API_KEY")
 GEMINI_MODEL = "gemini-2.0-flash-exp"  # Supports multimodal
 GEMINI_REST_URL = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:generateContent"
 
+# One pooled async HTTPS client for every Gemini call: keep-alive connections are reused
+# instead of paying a TCP + TLS handshake per request, and concurrent analyses run on the
+# event loop rather than each holding an executor thread
+GEMINI_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=32)
+GEMINI_TIMEOUT = httpx.Timeout(45.0)  # Longer timeout for multimodal
+
+# Rate limits and transient server errors are retried with backoff (generateContent is safe to resend)
+GEMINI_RETRY_STATUSES = {429, 500, 502, 503, 504}
+GEMINI_MAX_RETRIES = 2
+GEMINI_BACKOFF = 0.2
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared Gemini HTTP client, created on first use"""
+    global _http_client
+    if _http_client is None:
+        # Transport-level retries cover failed connects; status retries are in _call_gemini_multimodal_api
+        _http_client = httpx.AsyncClient(
+            timeout=GEMINI_TIMEOUT,
+            transport=httpx.AsyncHTTPTransport(http2=True, limits=GEMINI_LIMITS, retries=GEMINI_MAX_RETRIES)
+        )
+    return _http_client
+
+async def close_http_client():
+    """Close the shared Gemini HTTP client"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+# The same frame is often passed to several analyses; keep the last few encodes (~100 KB each)
+FRAME_B64_CACHE_SIZE = 64
+
+@functools.lru_cache(maxsize=FRAME_B64_CACHE_SIZE)
+def _b64(frame: bytes) -> str:
+    """Base64 a JPEG frame for an inlineData part (the output is plain ASCII); cached by frame content"""
+    return base64.b64encode(frame).decode('ascii')
+
+# Fixed prompt parts appended to each request, built once (the API layer only reads them)
+MULTIMODAL_PROMPT_PART = {"text": """
+Based on the multimodal data provided (text, audio transcript, and video frame), please provide:
+
+1. **Content Analysis**: Evaluate the substance and relevance of the response
+2. **Communication Skills**: Assess verbal clarity and articulation
+3. **Visual Presentation**: Analyze body language, professionalism, and engagement
+4. **Overall Assessment**: Provide a holistic evaluation
+5. **Next Question**: Generate an appropriate follow-up question
+
+Keep your analysis professional and constructive.
+"""}
+
+VIDEO_SEQUENCE_PROMPT_PART = {"text": """
+Please analyze these video frames for:
+
+1. **Consistency**: Does the candidate maintain professional posture?
+2. **Engagement**: How does their engagement level change over time?
+3. **Nervousness Indicators**: Any signs of anxiety or discomfort?
+4. **Confidence Patterns**: Changes in confidence throughout the sequence?
+5. **Overall Impression**: Professional presentation assessment
+
+Provide insights based on the temporal progression shown in the frames.
+"""}
+
+AUDIO_PATTERN_PROMPT_PART = {"text": """
+Based on these audio transcripts, please analyze:
+
+1. **Communication Clarity**: How clear and articulate is the candidate?
+2. **Language Proficiency**: Professional language usage and vocabulary
+3. **Response Patterns**: Consistency in communication style
+4. **Confidence Indicators**: Evidence of confidence or uncertainty in speech
+5. **Professional Tone**: Appropriateness for interview context
+6. **Improvement Areas**: Constructive feedback for communication enhancement
+
+Provide detailed insights about the candidate's verbal communication skills.
+"""}
+
+REPORT_PROMPT_PART = {"text": """
+Based on all the multimodal data collected during this interview, please generate a comprehensive report including:
+
+📊 **OVERALL PERFORMANCE RATING** (1-10 scale)
+- Communication Skills
+- Technical Competency
+- Visual Presentation
+- Professional Demeanor
+- Cultural Fit
+
+💬 **DETAILED ANALYSIS**
+- Strengths demonstrated
+- Areas for improvement
+- Interview highlights
+- Recommendation (Hire/No Hire/Additional Interview)
+
+🎯 **SPECIFIC FEEDBACK**
+- Communication effectiveness
+- Professional presentation
+- Technical knowledge demonstration
+- Interview performance consistency
+
+📝 **INTERVIEWER NOTES**
+- Key observations
+- Memorable responses
+- Overall impression
+
+Please provide a thorough, professional assessment suitable for HR review.
+"""}
+
+# Analyses kept per history; prompts only read the most recent few, totals are counted separately
+HISTORY_MAXLEN = 128
+RECENT_HISTORY = 5
+
+def _recent(history: deque) -> List[Dict]:
+    """Last RECENT_HISTORY entries of a bounded history"""
+    return list(islice(history, max(0, len(history) - RECENT_HISTORY), None))
+
 class EnhancedGeminiMultimodal:
     """Enhanced Gemini integration for audio and video processing"""
     
     def __init__(self):
-        self.conversation_history = []
-        self.video_analysis_history = []
-        self.audio_context = []
+        self.conversation_history = deque(maxlen=HISTORY_MAXLEN)
+        self.video_analysis_history = deque(maxlen=HISTORY_MAXLEN)
+        self.audio_context = deque(maxlen=HISTORY_MAXLEN)
+        # Lifetime totals for the report (the histories drop their oldest entries)
+        self.interaction_count = 0
+        self.video_analysis_count = 0
+        self.audio_analysis_count = 0
         
     async def process_multimodal_interview_data(
         self, 
@@ -51,7 +175,7 @@ class EnhancedGeminiMultimodal:
             
             # Add conversation history for context
             if self.conversation_history:
-                recent_history = self.conversation_history[-5:]  # Last 5 exchanges
+                recent_history = _recent(self.conversation_history)  # Last 5 exchanges
                 history_text = "Recent Conversation:\n"
                 for msg in recent_history:
                     history_text += f"{msg['role']}: {msg['content'][:100]}...\n"
@@ -70,7 +194,7 @@ class EnhancedGeminiMultimodal:
             
             # Add video frame for analysis
             if video_frame:
-                video_b64 = base64.b64encode(video_frame).decode('utf-8')
+                video_b64 = _b64(video_frame)
                 parts.append({
                     "inlineData": {
                         "mimeType": "image/jpeg",
@@ -82,18 +206,7 @@ class EnhancedGeminiMultimodal:
                 })
             
             # Add comprehensive analysis prompt
-            analysis_prompt = """
-            Based on the multimodal data provided (text, audio transcript, and video frame), please provide:
-            
-            1. **Content Analysis**: Evaluate the substance and relevance of the response
-            2. **Communication Skills**: Assess verbal clarity and articulation
-            3. **Visual Presentation**: Analyze body language, professionalism, and engagement
-            4. **Overall Assessment**: Provide a holistic evaluation
-            5. **Next Question**: Generate an appropriate follow-up question
-            
-            Keep your analysis professional and constructive.
-            """
-            parts.append({"text": analysis_prompt})
+            parts.append(MULTIMODAL_PROMPT_PART)
             
             # Make API call
             response_data = await self._call_gemini_multimodal_api(parts)
@@ -110,6 +223,7 @@ class EnhancedGeminiMultimodal:
                 }
                 
                 self.conversation_history.append(analysis)
+                self.interaction_count += 1
                 
                 return {
                     "success": True,
@@ -144,7 +258,7 @@ class EnhancedGeminiMultimodal:
             
             # Add multiple frames for temporal analysis
             for i, frame in enumerate(video_frames[:5]):  # Limit to 5 frames for API efficiency
-                frame_b64 = base64.b64encode(frame).decode('utf-8')
+                frame_b64 = _b64(frame)
                 parts.append({
                     "inlineData": {
                         "mimeType": "image/jpeg",
@@ -156,18 +270,7 @@ class EnhancedGeminiMultimodal:
                 })
             
             # Add analysis prompt
-            analysis_prompt = """
-            Please analyze these video frames for:
-            
-            1. **Consistency**: Does the candidate maintain professional posture?
-            2. **Engagement**: How does their engagement level change over time?
-            3. **Nervousness Indicators**: Any signs of anxiety or discomfort?
-            4. **Confidence Patterns**: Changes in confidence throughout the sequence?
-            5. **Overall Impression**: Professional presentation assessment
-            
-            Provide insights based on the temporal progression shown in the frames.
-            """
-            parts.append({"text": analysis_prompt})
+            parts.append(VIDEO_SEQUENCE_PROMPT_PART)
             
             response_data = await self._call_gemini_multimodal_api(parts)
             
@@ -181,6 +284,7 @@ class EnhancedGeminiMultimodal:
                 }
                 
                 self.video_analysis_history.append(analysis)
+                self.video_analysis_count += 1
                 
                 return {
                     "success": True,
@@ -221,19 +325,7 @@ class EnhancedGeminiMultimodal:
                 })
             
             # Add analysis prompt
-            analysis_prompt = """
-            Based on these audio transcripts, please analyze:
-            
-            1. **Communication Clarity**: How clear and articulate is the candidate?
-            2. **Language Proficiency**: Professional language usage and vocabulary
-            3. **Response Patterns**: Consistency in communication style
-            4. **Confidence Indicators**: Evidence of confidence or uncertainty in speech
-            5. **Professional Tone**: Appropriateness for interview context
-            6. **Improvement Areas**: Constructive feedback for communication enhancement
-            
-            Provide detailed insights about the candidate's verbal communication skills.
-            """
-            parts.append({"text": analysis_prompt})
+            parts.append(AUDIO_PATTERN_PROMPT_PART)
             
             response_data = await self._call_gemini_multimodal_api(parts)
             
@@ -246,6 +338,7 @@ class EnhancedGeminiMultimodal:
                 }
                 
                 self.audio_context.append(analysis)
+                self.audio_analysis_count += 1
                 
                 return {
                     "success": True,
@@ -276,12 +369,12 @@ class EnhancedGeminiMultimodal:
             if self.conversation_history:
                 parts.append({
                     "text": f"Interview Summary:\n"
-                           f"- Total interactions: {len(self.conversation_history)}\n"
-                           f"- Multimodal analyses: {len([m for m in self.conversation_history if m.get('type') == 'multimodal_analysis'])}\n\n"
+                           f"- Total interactions: {self.interaction_count}\n"
+                           f"- Multimodal analyses: {self.interaction_count}\n\n"
                            f"Key Response Highlights:\n"
                 })
                 
-                for i, msg in enumerate(self.conversation_history[-5:], 1):
+                for i, msg in enumerate(_recent(self.conversation_history), 1):
                     if msg.get('input_text'):
                         parts.append({
                             "text": f"{i}. {msg['input_text'][:100]}...\n"
@@ -291,47 +384,18 @@ class EnhancedGeminiMultimodal:
             if self.video_analysis_history:
                 parts.append({
                     "text": f"\nVideo Analysis Summary:\n"
-                           f"- Video sequences analyzed: {len(self.video_analysis_history)}\n\n"
+                           f"- Video sequences analyzed: {self.video_analysis_count}\n\n"
                 })
             
             # Add audio analysis summary
             if self.audio_context:
                 parts.append({
                     "text": f"\nAudio Analysis Summary:\n"
-                           f"- Audio patterns analyzed: {len(self.audio_context)}\n\n"
+                           f"- Audio patterns analyzed: {self.audio_analysis_count}\n\n"
                 })
             
             # Add comprehensive report prompt
-            report_prompt = """
-            Based on all the multimodal data collected during this interview, please generate a comprehensive report including:
-            
-            📊 **OVERALL PERFORMANCE RATING** (1-10 scale)
-            - Communication Skills
-            - Technical Competency
-            - Visual Presentation
-            - Professional Demeanor
-            - Cultural Fit
-            
-            💬 **DETAILED ANALYSIS**
-            - Strengths demonstrated
-            - Areas for improvement
-            - Interview highlights
-            - Recommendation (Hire/No Hire/Additional Interview)
-            
-            🎯 **SPECIFIC FEEDBACK**
-            - Communication effectiveness
-            - Professional presentation
-            - Technical knowledge demonstration
-            - Interview performance consistency
-            
-            📝 **INTERVIEWER NOTES**
-            - Key observations
-            - Memorable responses
-            - Overall impression
-            
-            Please provide a thorough, professional assessment suitable for HR review.
-            """
-            parts.append({"text": report_prompt})
+            parts.append(REPORT_PROMPT_PART)
             
             response_data = await self._call_gemini_multimodal_api(parts)
             
@@ -342,9 +406,9 @@ class EnhancedGeminiMultimodal:
                     "type": "comprehensive_report",
                     "timestamp": datetime.now().isoformat(),
                     "data_summary": {
-                        "total_interactions": len(self.conversation_history),
-                        "video_analyses": len(self.video_analysis_history),
-                        "audio_analyses": len(self.audio_context)
+                        "total_interactions": self.interaction_count,
+                        "video_analyses": self.video_analysis_count,
+                        "audio_analyses": self.audio_analysis_count
                     }
                 }
             
@@ -368,17 +432,19 @@ class EnhancedGeminiMultimodal:
                 }
             }
             
-            # Make async request
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                lambda: requests.post(
-                    f"{GEMINI_REST_URL}?key={GEMINI_API_KEY}",
+            # orjson writes the body bytes in one pass, including the base64 frame strings
+            body = orjson.dumps(data)
+            client = get_http_client()
+            for attempt in range(GEMINI_MAX_RETRIES + 1):
+                response = await client.post(
+                    GEMINI_REST_URL,
+                    params={"key": GEMINI_API_KEY},
                     headers=headers,
-                    json=data,
-                    timeout=45  # Longer timeout for multimodal
+                    content=body
                 )
-            )
+                if response.status_code not in GEMINI_RETRY_STATUSES or attempt == GEMINI_MAX_RETRIES:
+                    break
+                await asyncio.sleep(GEMINI_BACKOFF * 2 ** attempt)
             
             if response.status_code == 200:
                 result = response.json()
@@ -397,31 +463,51 @@ class EnhancedGeminiMultimodal:
             return None
 
 # Utility functions for video processing
+
+# JPEG encodes run in worker threads (OpenCV releases the GIL) while the main thread keeps decoding
+FRAME_ENCODE_WORKERS = 4
+
 def extract_video_frames(video_path: str, max_frames: int = 10) -> List[bytes]:
     """Extract frames from video for analysis"""
-    frames = []
     try:
         cap = cv2.VideoCapture(video_path)
         frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        interval = max(1, frame_count // max_frames)
         
-        frame_idx = 0
-        while cap.isOpened() and len(frames) < max_frames:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            if frame_idx % interval == 0:
-                # Resize frame for efficiency
-                frame = cv2.resize(frame, (640, 480))
-                # Convert to JPEG bytes
-                _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
-                frames.append(buffer.tobytes())
-            
-            frame_idx += 1
+        # Sample indices spread evenly from the first frame to the last, computed up front;
+        # streams that don't report a frame count get their first max_frames frames
+        if frame_count > 0:
+            sample_indices = np.unique(np.linspace(0, frame_count - 1, max_frames).astype(np.int64)).tolist()
+        else:
+            sample_indices = list(range(max_frames))
+        samples = iter(sample_indices)
+        next_sample = next(samples, None)
+        # One allocation for every resized frame; each sample gets its own slot because
+        # encodes of earlier samples may still be reading theirs
+        resized = np.empty((len(sample_indices), 480, 640, 3), dtype=np.uint8)
         
-        cap.release()
-        return frames
+        # VideoCapture isn't thread-safe, so reads stay on this thread
+        with ThreadPoolExecutor(max_workers=FRAME_ENCODE_WORKERS) as pool:
+            encodes = []
+            frame_idx = 0
+            while cap.isOpened() and next_sample is not None:
+                # grab() only advances; frames between samples are never decoded
+                if not cap.grab():
+                    break
+                
+                if frame_idx == next_sample:
+                    next_sample = next(samples, None)
+                    ret, frame = cap.retrieve()
+                    if not ret:
+                        break
+                    # Resize frame for efficiency, into this sample's slot
+                    frame = cv2.resize(frame, (640, 480), dst=resized[len(encodes)], interpolation=cv2.INTER_AREA)
+                    # Convert to JPEG bytes
+                    encodes.append(pool.submit(cv2.imencode, '.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80]))
+                
+                frame_idx += 1
+            
+            cap.release()
+            return [encode.result()[1].tobytes() for encode in encodes]
         
     except Exception as e:
         print(f"Error extracting video frames: {e}")
@@ -455,21 +541,8 @@ async def demo_enhanced_multimodal():
     
     gemini = EnhancedGeminiMultimodal()
     
-    # Demo 1: Multimodal analysis with text and video
-    print("\n🧪 Demo 1: Multimodal Text + Video Analysis")
+    # Demos 1 and 2 are independent, so their Gemini calls run concurrently
     frame = capture_live_frame()
-    if frame:
-        result = await gemini.process_multimodal_interview_data(
-            text_input="I have 5 years of experience in Python development and machine learning.",
-            video_frame=frame,
-            interview_context="Software Engineer position interview"
-        )
-        if result["success"]:
-            print("✅ Multimodal analysis completed!")
-            print(f"Analysis: {result['analysis'][:200]}...")
-    
-    # Demo 2: Audio pattern analysis
-    print("\n🧪 Demo 2: Audio Pattern Analysis")
     sample_transcripts = [
         "I have extensive experience with Python and machine learning frameworks.",
         "In my previous role, I led a team of five developers on a major project.",
@@ -481,12 +554,28 @@ async def demo_enhanced_multimodal():
         "2024-01-15 10:35:15"
     ]
     
-    audio_result = await gemini.analyze_audio_patterns(
+    analyses = [gemini.analyze_audio_patterns(
         audio_transcripts=sample_transcripts,
         timestamps=sample_timestamps,
         context="Technical interview for Senior Developer position"
-    )
+    )]
+    if frame:
+        analyses.append(gemini.process_multimodal_interview_data(
+            text_input="I have 5 years of experience in Python development and machine learning.",
+            video_frame=frame,
+            interview_context="Software Engineer position interview"
+        ))
+    audio_result, *multimodal_results = await asyncio.gather(*analyses)
+    
+    # Demo 1: Multimodal analysis with text and video
+    print("\n🧪 Demo 1: Multimodal Text + Video Analysis")
+    for result in multimodal_results:
+        if result["success"]:
+            print("✅ Multimodal analysis completed!")
+            print(f"Analysis: {result['analysis'][:200]}...")
     
+    # Demo 2: Audio pattern analysis
+    print("\n🧪 Demo 2: Audio Pattern Analysis")
     if audio_result["success"]:
         print("✅ Audio pattern analysis completed!")
         print(f"Analysis: {audio_result['analysis'][:200]}...")
@@ -500,5 +589,12 @@ async def demo_enhanced_multimodal():
     
     print("\n🎉 Enhanced multimodal demo completed!")
 
+async def main():
+    """Run the demo, then close the shared HTTP client"""
+    try:
+        await demo_enhanced_multimodal()
+    finally:
+        await close_http_client()
+
 if __name__ == "__main__":
-    asyncio.run(demo_enhanced_multimodal())
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file
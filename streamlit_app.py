@@ -94,10 +94,13 @@ def get_latest_resume_data(applicant_id):
     try:
         result = get_applicant_resumes(applicant_id)
         if "error" not in result and result.get("resumes"):
-            # Get the most recent resume (assuming they're ordered by upload time)
+            # The list is ordered newest first and only carries metadata,
+            # so fetch the full parsed data for the latest upload
             latest_resume = result["resumes"][0]
-            if isinstance(latest_resume, dict):
-                return latest_resume.get("parsed_data", {})
+            if isinstance(latest_resume, dict) and latest_resume.get("id"):
+                response = requests.get(f"{API_BASE}/applicant/resume/{latest_resume['id']}")
+                if response.status_code == 200:
+                    return response.json().get("parsed_data", {})
         return None
     except Exception as e:
         return None